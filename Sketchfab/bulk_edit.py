@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from retry import RetryEngine
+
+SKETCHFAB_API_URL = 'https://api.sketchfab.com/v3'
+EDITABLE_FIELDS = ('tags', 'categories', 'description', 'license', 'price', 'private', 'password')
+
+
+class RatePacer:
+    """
+    Space out requests from many threads so they never exceed a fixed rate.
+    """
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        Block until the calling thread is allowed to send its next request.
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def build_patch_data(changes):
+    """
+    Keep only the fields that are meant to change. None means leave the field as it is.
+    """
+    patch_data = {field: changes[field] for field in EDITABLE_FIELDS if changes.get(field) is not None}
+    if patch_data.get('private') is False:
+        patch_data.pop('password', None)
+    return patch_data
+
+
+def slugify_tag(tag):
+    """
+    Turn a tag the way Sketchfab stores it, e.g. "This is a new tag" becomes "this-is-a-new-tag".
+    """
+    tag = re.sub(r'[^\w\s-]', '', tag).strip().lower()
+    return re.sub(r'[-\s]+', '-', tag)
+
+
+def list_account_models(api_key):
+    """
+    Fetch all models of the account behind the API key, following the paginated results.
+    """
+    headers = {'Authorization': f'Token {api_key}'}
+    url = f'{SKETCHFAB_API_URL}/me/models'
+    models = []
+    while url:
+        response = requests.get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+        page = response.json()
+        models.extend(page.get('results', []))
+        url = page.get('next')
+    return models
+
+
+def select_models(models, name_contains=None, tag=None):
+    """
+    Filter a model list by part of the name and by tag, returning the matching UIDs.
+    The tag is compared as a slug, so "My Tag" finds models tagged my-tag.
+    """
+    uids = []
+    tag = slugify_tag(tag) if tag else None
+    for model in models:
+        if name_contains and name_contains.lower() not in model.get('name', '').lower():
+            continue
+        if tag and tag not in [t.get('slug') or slugify_tag(t.get('name', '')) for t in model.get('tags', [])]:
+            continue
+        uids.append(model['uid'])
+    return uids
+
+
+class BulkEditEngine:
+    """
+    Apply the same metadata change to many models with concurrent, rate-paced PATCH requests.
+
+    Every finished model is appended to a JSONL checkpoint together with a hash of the change set.
+    Running the same edit again skips the models that were already patched, a different edit
+    with the same checkpoint file patches them all.
+    """
+    def __init__(self, api_key, changes, checkpoint_path, workers=6, requests_per_second=2.0,
+                 retry_engine=None, on_result=None):
+        self.api_key = api_key
+        self.patch_data = build_patch_data(changes)
+        self.change_key = hashlib.sha1(json.dumps(self.patch_data, sort_keys=True).encode('utf-8')).hexdigest()
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.retry_engine = retry_engine or RetryEngine()
+        self.on_result = on_result
+        self.pacer = RatePacer(requests_per_second)
+        self.checkpoint_lock = threading.Lock()
+        self.results = {}
+
+    def load_checkpoint(self):
+        """
+        Return the UIDs that were already patched successfully by an earlier run of the same edit.
+        """
+        done = set()
+        if not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as checkpoint:
+            for line in checkpoint:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Partially written last line after a crash
+                if entry.get('status') == 'success' and entry.get('changes') == self.change_key:
+                    done.add(entry['uid'])
+        return done
+
+    def run(self, uids):
+        """
+        Patch every UID that is not in the checkpoint yet and return the results by UID.
+        """
+        done = self.load_checkpoint()
+        pending = [uid for uid in dict.fromkeys(uids) if uid not in done]
+        for uid in uids:
+            if uid in done:
+                self.report(uid, 'skipped', 'Already patched in an earlier run', write=False)
+        if not self.patch_data:
+            for uid in pending:
+                self.report(uid, 'error', 'No fields to change', write=False)
+            return self.results
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {uid: executor.submit(self.patch_one, uid) for uid in pending}
+        for uid, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                # E.g. the checkpoint can't be written or the callback failed, don't leave the model unreported
+                try:
+                    self.report(uid, 'error', f"{type(e).__name__}: {e}")
+                except Exception:
+                    self.results[uid] = ('error', f"{type(e).__name__}: {e}")
+        return self.results
+
+    def patch_one(self, uid):
+        """
+        Patch a single model through the retry engine.
+        """
+        headers = {'Authorization': f'Token {self.api_key}', 'Content-Type': 'application/json'}
+        endpoint = f'{SKETCHFAB_API_URL}/models/{uid}'
+
+        def send():
+            self.pacer.wait()
+            return requests.patch(endpoint, headers=headers, data=json.dumps(self.patch_data), timeout=30)
+
+        outcome, value, category = self.retry_engine.call(send)
+        if outcome == 'success':
+            self.report(uid, 'success', 'Patched')
+        else:
+            self.report(uid, 'error', value)
+
+    def report(self, uid, status, detail, write=True):
+        """
+        Store a per-model result, append it to the checkpoint and pass it to the callback.
+        """
+        self.results[uid] = (status, detail)
+        if write:
+            with self.checkpoint_lock:
+                with open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+                    checkpoint.write(json.dumps({'uid': uid, 'status': status, 'detail': detail, 'changes': self.change_key,
+                                                 'time': time.time()}) + '\n')
+        if self.on_result:
+            self.on_result(uid, status, detail)
@@ -0,0 +1,340 @@
+"""
+Upload engine that runs in its own process, so zipping and the upload threads never slow down the window.
+
+The GUI starts it when needed and talks to it over a local socket. The engine keeps running when
+the window is closed, opening the GUI again attaches to it and shows its batches. It exits on its
+own once it has been idle without a GUI attached for a while. It can also be started by hand:
+
+    python engine.py
+"""
+import argparse
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from time import monotonic, sleep
+
+from event_log import EventLog
+from pipeline import UploadPipeline
+from retry import CircuitBreaker, RetryEngine
+from scheduler import Batch, BatchScheduler
+from simulator import StageTimings
+
+ENGINE_FILE = 'sketchfab_engine.json'  # Address and key of the running engine
+MAX_EVENTS_PER_UPDATE = 500
+
+
+class EngineError(Exception):
+    """
+    Raised by EngineClient when the engine rejected a command.
+    """
+
+
+class UploadEngine:
+    """
+    Run batches through the scheduler and keep the latest state of every model for the GUI.
+
+    Status rows are coalesced, a model that changed ten times between two polls of the GUI
+    is sent once with its latest values.
+    """
+    def __init__(self, events):
+        self.events = events
+        self.breaker = CircuitBreaker(on_state_change=self.on_breaker_change)
+        self.retry_engine = RetryEngine(self.breaker)
+        self.timings = StageTimings()
+        self.scheduler = BatchScheduler(self.upload_folder, before_start=lambda: self.breaker.wait(probe=False), on_batch_done=self.on_batch_done)
+        self.pipeline = UploadPipeline(self.retry_engine, self.timings, events, self.report,
+                                       self.scheduler.poll_limiter, self.scheduler.patch_limiter)
+        self.batches = {}  # Batch id -> Batch, finished ones included so a reattached GUI still shows them
+        self.rows = OrderedDict()  # (tab name, model name) -> (version, row values), least recently changed first
+        self.version = 0
+        self.polling = 0
+        self.lock = threading.Lock()
+
+    def submit(self, name, folder_paths, metadata, priority=1, continuous=False, api_key=None, batch_id=None):
+        """
+        Start a batch and return the name of its status tab.
+        """
+        batch = Batch(name, folder_paths, metadata, priority, continuous, api_key, batch_id)
+        with self.lock:
+            self.batches[batch.id] = batch
+        self.scheduler.submit(batch)
+        self.events.log(f"Queued {batch.total} models in batch {batch.tab_name}.", batch=batch.id)
+        return batch.tab_name
+
+    def add_folder(self, batch_id, folder_path):
+        """
+        Queue another folder for a continuous batch.
+        """
+        batch = self.get_batch(batch_id)
+        self.report(batch, os.path.basename(folder_path), 'Queued', 'Waiting', 'Patch Not Started', 'In Progress')
+        self.scheduler.add_folder(batch, folder_path)
+
+    def close_batch(self, batch_id):
+        """
+        Stop a continuous batch from waiting for more folders.
+        """
+        self.scheduler.close(self.get_batch(batch_id))
+
+    def get_batch(self, batch_id):
+        """
+        Return a batch by id. Raises ValueError for batches this engine doesn't know.
+        """
+        with self.lock:
+            batch = self.batches.get(batch_id)
+        if batch is None:
+            raise ValueError(f"The upload engine has no batch {batch_id}, it may have been restarted")
+        return batch
+
+    def updates(self, since_version=0, since_seq=0):
+        """
+        Return what changed since the given row version and event sequence number.
+        """
+        rows = []
+        with self.lock:
+            for (tab_name, model_name), (version, values) in reversed(self.rows.items()):
+                if version <= since_version:
+                    break
+                rows.append((tab_name, values))
+            batches = [(batch.tab_name, None if batch.continuous else batch.total) for batch in self.batches.values()]
+            version = self.version
+        rows.reverse()
+        events = self.events.events_since(since_seq, min_level='info')[-MAX_EVENTS_PER_UPDATE:]
+        return {
+            'version': version,
+            'rows': rows,
+            'seq': events[-1]['seq'] if events else since_seq,
+            'events': [(event['level'], event['message']) for event in events],
+            'batches': batches,
+        }
+
+    def is_busy(self):
+        """
+        Check whether any model is still waiting, uploading or processing.
+        """
+        return bool(self.scheduler.batches) or self.polling > 0
+
+    def report(self, batch, model_name, status, progress, patch_status, summary):
+        """
+        Store the latest progress of a model, the GUI picks it up on its next poll.
+        """
+        level = 'error' if 'Failed' in status or 'Failed' in patch_status else 'debug'
+        self.events.log(f"{model_name}: {status}, {progress}, {patch_status}", level, model=model_name, batch=batch.tab_name,
+                        status=status, progress=progress, patch_status=patch_status, summary=summary)
+        key = (batch.tab_name, model_name)
+        with self.lock:
+            self.version += 1
+            self.rows[key] = (self.version, (model_name, status, progress, patch_status, summary))
+            self.rows.move_to_end(key)
+
+    def upload_folder(self, batch, folder_path):
+        """
+        Upload a folder once the scheduler gave it a slot, processing is polled in the background.
+        """
+        try:
+            uploaded = self.pipeline.upload_folder(batch, folder_path)
+        except Exception as e:
+            # Nobody would see the traceback of a detached process, show it in the status tab
+            self.events.log(f"Upload of {folder_path} failed: {e}", 'error', folder=folder_path, batch=batch.id)
+            self.report(batch, os.path.basename(folder_path), 'Upload Failed', str(e), 'Failed', 'Aborted')
+            return
+        if uploaded:
+            uid, url, original_license, upload_size = uploaded
+            with self.lock:
+                self.polling += 1
+            threading.Thread(target=self.poll_processing_status,
+                             args=(batch, url, os.path.basename(folder_path), uid, original_license, batch.metadata['price'], upload_size),
+                             daemon=True).start()
+
+    def poll_processing_status(self, batch, *args):
+        try:
+            self.pipeline.poll_processing_status(batch, *args)
+        finally:
+            with self.lock:
+                self.polling -= 1
+
+    def on_batch_done(self, batch):
+        self.events.log(f"All uploads of batch {batch.tab_name} completed.", batch=batch.id)
+
+    def on_breaker_change(self, opened, reason):
+        if opened:
+            self.events.log(f"Pausing all requests: {reason}", 'warning')
+        else:
+            self.events.log(f"Resuming requests: {reason}")
+
+
+class EngineServer:
+    """
+    Serve an UploadEngine to GUI processes over an authenticated local socket.
+
+    Every client sends (command, keyword arguments) and gets back ('ok', result) or ('error', message).
+    The address and a random key are written to state_path, only processes that can read
+    that file can connect.
+    """
+    COMMANDS = ('submit', 'add_folder', 'close_batch', 'updates', 'is_busy')
+
+    def __init__(self, engine, state_path=ENGINE_FILE, idle_timeout=600):
+        self.engine = engine
+        self.state_path = state_path
+        self.idle_timeout = idle_timeout
+        self.authkey = secrets.token_bytes(32)
+        self.listener = Listener(('127.0.0.1', 0), authkey=self.authkey)
+        self.clients = 0
+        self.lock = threading.Lock()
+
+    def serve(self):
+        """
+        Accept clients until the engine has been idle without clients for idle_timeout seconds.
+        """
+        self.write_state()
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        idle_since = monotonic()
+        try:
+            while True:
+                sleep(5)
+                if self.clients or self.engine.is_busy():
+                    idle_since = monotonic()
+                elif monotonic() - idle_since > self.idle_timeout:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.remove_state()
+            self.engine.events.close()
+
+    def accept_loop(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except (AuthenticationError, OSError, EOFError):
+                continue  # A stale client or something else probing the port
+            threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+    def handle(self, connection):
+        """
+        Answer the commands of one client until it disconnects.
+        """
+        with self.lock:
+            self.clients += 1
+        try:
+            while True:
+                try:
+                    command, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    break
+                if command not in self.COMMANDS:
+                    connection.send(('error', f"Unknown command {command!r}"))
+                    continue
+                try:
+                    connection.send(('ok', getattr(self.engine, command)(**kwargs)))
+                except Exception as e:
+                    connection.send(('error', str(e)))
+        finally:
+            connection.close()
+            with self.lock:
+                self.clients -= 1
+
+    def write_state(self):
+        host, port = self.listener.address
+        state = {'host': host, 'port': port, 'authkey': self.authkey.hex(), 'pid': os.getpid()}
+        temporary_path = f"{self.state_path}.{os.getpid()}"
+        # Only the current user may read the key
+        with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file)
+        os.replace(temporary_path, self.state_path)
+
+    def remove_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as state_file:
+                if json.load(state_file).get('pid') != os.getpid():
+                    return  # Another engine took over the file
+            os.remove(self.state_path)
+        except (OSError, ValueError):
+            pass
+
+
+class EngineClient:
+    """
+    Connection of the GUI to a running engine, safe to share between threads.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, state_path=ENGINE_FILE):
+        """
+        Attach to the engine described by state_path. Raises OSError when none is running.
+        """
+        try:
+            with open(state_path, 'r', encoding='utf-8') as state_file:
+                state = json.load(state_file)
+            return cls(Client((state['host'], state['port']), authkey=bytes.fromhex(state['authkey'])))
+        except (ValueError, KeyError, AuthenticationError, EOFError) as e:
+            raise OSError(f"No engine to attach to: {e}")
+
+    @classmethod
+    def connect_or_start(cls, state_path=ENGINE_FILE, timeout=20):
+        """
+        Attach to the running engine, starting one first if there is none.
+        """
+        try:
+            return cls.connect(state_path)
+        except OSError:
+            start_engine_process(state_path)
+        deadline = monotonic() + timeout
+        while True:
+            sleep(0.2)
+            try:
+                return cls.connect(state_path)
+            except OSError:
+                if monotonic() > deadline:
+                    raise
+
+    def call(self, command, **kwargs):
+        """
+        Run a command in the engine and return its result.
+        """
+        with self.lock:
+            self.connection.send((command, kwargs))
+            status, result = self.connection.recv()
+        if status != 'ok':
+            raise EngineError(result)
+        return result
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def start_engine_process(state_path=ENGINE_FILE):
+    """
+    Start an engine in the background, detached so it outlives the GUI.
+    """
+    if getattr(sys, 'frozen', False):
+        # Built with cx_Freeze, the engine is an executable next to the GUI
+        command = [os.path.join(os.path.dirname(sys.executable), 'engine.exe' if sys.platform == 'win32' else 'engine')]
+    else:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'engine.py')]
+    command += ['--state-file', state_path]
+    if sys.platform == 'win32':
+        options = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        options = {'start_new_session': True}
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Sketchfab upload engine for the GUI.")
+    parser.add_argument('--state-file', default=ENGINE_FILE, help="Where to write the address of the engine")
+    parser.add_argument('--idle-timeout', type=int, default=600, help="Seconds to stay up without work or a GUI attached")
+    args = parser.parse_args()
+    EngineServer(UploadEngine(EventLog('sketchfab_engine_events.jsonl')), args.state_file, args.idle_timeout).serve()
+
+
+if __name__ == "__main__":
+    main()
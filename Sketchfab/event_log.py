@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+
+class EventLog:
+    """
+    Structured event log shared by all upload threads.
+
+    Recent events are kept in a bounded ring buffer for the UI. Every event is also appended
+    to a rotating JSONL file, written in batches by a background thread so logging never
+    waits on the disk.
+    """
+    def __init__(self, path='sketchfab_events.jsonl', capacity=2000, max_bytes=5 * 1024 * 1024,
+                 backups=3, flush_interval=1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=capacity)
+        self.seq = 0
+        self._unwritten = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def log(self, message, level='info', **fields):
+        """
+        Record an event. Extra keyword arguments are stored as structured fields.
+        """
+        event = {'time': time.time(), 'level': level, 'message': message}
+        event.update(fields)
+        with self._lock:
+            self.seq += 1
+            event['seq'] = self.seq
+            self.buffer.append(event)
+            self._unwritten.append(event)
+        return event
+
+    def events_since(self, seq, min_level='debug'):
+        """
+        Return buffered events newer than seq, at or above the given level.
+        """
+        threshold = LEVELS[min_level]
+        events = []
+        with self._lock:
+            for event in reversed(self.buffer):
+                if event['seq'] <= seq:
+                    break
+                if LEVELS.get(event['level'], 0) >= threshold:
+                    events.append(event)
+        events.reverse()
+        return events
+
+    def flush(self):
+        """
+        Write all pending events to disk.
+        """
+        with self._lock:
+            batch, self._unwritten = self._unwritten, []
+        if not batch:
+            return
+        lines = ''.join(json.dumps(event, default=str) + '\n' for event in batch)
+        try:
+            with open(self.path, 'a', encoding='utf-8') as log_file:
+                log_file.write(lines)
+            if os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            pass  # A missing or read-only log location must not break uploads
+
+    def close(self):
+        """
+        Stop the writer thread and write what is left.
+        """
+        self._stop_event.set()
+        self._writer.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def _write_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def _rotate(self):
+        """
+        Shift log.jsonl to log.jsonl.1, log.jsonl.1 to log.jsonl.2 and so on, dropping the oldest.
+        """
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -0,0 +1,359 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+import requests
+
+from bulk_edit import RatePacer, slugify_tag
+from pipeline import SKETCHFAB_API_URL
+from retry import RetryEngine
+
+MAX_NAME_LENGTH = 48  # Sketchfab cuts longer names, upload_model does the same
+PAGE_SIZE = 24
+FINAL_PROCESSING = ('SUCCEEDED', 'FAILED')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    uid TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT,
+    processing TEXT,
+    license TEXT,
+    tags TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    removed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS models_name ON models (name);
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL,
+    name TEXT,
+    change TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def upload_name(folder_path):
+    """
+    Name a model folder gets on Sketchfab.
+    """
+    return os.path.basename(os.path.normpath(folder_path))[:MAX_NAME_LENGTH]
+
+
+def offset_page_urls(next_url, count):
+    """
+    Work out the URLs of the next count pages when the API pages by a numeric offset.
+    Returns an empty list for opaque cursors, those pages can only be followed one by one.
+    """
+    if not next_url:
+        return []
+    parts = urlparse(next_url)
+    query = parse_qs(parts.query)
+    cursor = query.get('cursor', [''])[0]
+    if not cursor.isdigit():
+        return []
+    offset = int(cursor)
+    step = int(query.get('count', [PAGE_SIZE])[0])
+    urls = []
+    for index in range(count):
+        query['cursor'] = [str(offset + index * step)]
+        urls.append(urlunparse(parts._replace(query=urlencode(query, doseq=True))))
+    return urls
+
+
+def created_time(created_at):
+    """
+    Parse the createdAt of an API model into a naive UTC datetime.
+    """
+    return datetime.fromisoformat(created_at.rstrip('Z')).replace(tzinfo=None)
+
+
+def model_record(model):
+    """
+    Pick the fields reconciliation needs out of an API model.
+    """
+    license_info = model.get('license')
+    if isinstance(license_info, dict):
+        license_info = license_info.get('slug') or license_info.get('label')
+    tags = sorted(tag.get('slug') or slugify_tag(tag.get('name', '')) if isinstance(tag, dict) else slugify_tag(tag)
+                  for tag in model.get('tags') or [])
+    return {
+        'uid': model['uid'],
+        'name': model.get('name', ''),
+        'created_at': model.get('createdAt'),
+        'processing': (model.get('status') or {}).get('processing'),
+        'license': license_info,
+        'tags': tags,
+    }
+
+
+class ModelInventory:
+    """
+    Local cache of the models on the account, used to reconcile the account with local folders.
+
+    The listing is fetched newest first with several pages in flight at once. An incremental sync
+    stops once it reaches models older than the newest model of the last completed sync, so an
+    interrupted sync is picked up by the next one. A full sync walks every page and also notices
+    models that were deleted on the website. Every added, changed or removed model is
+    recorded in the changes table.
+    """
+    def __init__(self, api_key, path='sketchfab_inventory.db', workers=6, requests_per_second=4.0,
+                 retry_engine=None, on_progress=None):
+        self.api_key = api_key
+        self.path = path
+        self.workers = workers
+        self.retry_engine = retry_engine or RetryEngine()
+        self.on_progress = on_progress
+        self.pacer = RatePacer(requests_per_second)
+        self.local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        """
+        Return the SQLite connection of the calling thread.
+        """
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.row_factory = sqlite3.Row
+            self.local.db = db
+        return db
+
+    def get_state(self, key):
+        row = self.connection().execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_state(self, key, value):
+        with self.connection() as db:
+            db.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, value))
+
+    def fetch(self, url):
+        """
+        GET an API URL through the pacer and the retry engine and return the decoded JSON.
+        """
+        headers = {'Authorization': f'Token {self.api_key}'}
+
+        def send():
+            self.pacer.wait()
+            return requests.get(url, headers=headers, timeout=30)
+
+        outcome, value, category = self.retry_engine.call(send)
+        if outcome != 'success':
+            raise requests.RequestException(f"{url}: {value}")
+        return value.json()
+
+    def iter_pages(self, executor):
+        """
+        Yield the account models window by window, newest first.
+        """
+        url = f'{SKETCHFAB_API_URL}/me/models?sort_by=-createdAt&count={PAGE_SIZE}'
+        while url:
+            page = self.fetch(url)
+            window = [page]
+            following = offset_page_urls(page.get('next'), self.workers - 1)
+            if following:
+                window += list(executor.map(self.fetch, following))
+            yield [model for page in window for model in page.get('results', [])]
+            url = window[-1].get('next')
+
+    def sync(self, full=False):
+        """
+        Bring the cache up to date with the account and return counts of what changed.
+        The first sync is always a full one.
+        """
+        started = time.time()
+        full = full or self.get_state('last_full_sync') is None
+        synced_until = None if full else self.get_state('synced_created_at')
+        counts = {'fetched': 0, 'added': 0, 'updated': 0, 'removed': 0, 'refreshed': 0}
+        seen = set()
+        newest = None
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for models in self.iter_pages(executor):
+                self.store(models, seen, counts)
+                counts['fetched'] += len(models)
+                if self.on_progress:
+                    self.on_progress(counts['fetched'])
+                dates = [model['createdAt'] for model in models if model.get('createdAt')]
+                newest = newest or (dates[0] if dates else None)
+                if synced_until and dates and created_time(dates[-1]) < created_time(synced_until):
+                    break  # Newest first, everything older was fetched by a completed sync
+
+            if full:
+                counts['removed'] = self.mark_removed(seen, started, counts)
+                self.set_state('last_full_sync', str(started))
+            if newest:
+                # Only a sync that got this far moves the point the next incremental sync stops at
+                self.set_state('synced_created_at', newest)
+
+            # The listing doesn't change when processing finishes, ask about unfinished models directly
+            unfinished = [row['uid'] for row in self.connection().execute(
+                'SELECT uid FROM models WHERE removed = 0 AND (processing IS NULL OR processing NOT IN (?, ?))', FINAL_PROCESSING)]
+            for model in executor.map(self.fetch_model, unfinished):
+                if model is not None:
+                    self.store([model], set(), counts)
+                    counts['refreshed'] += 1
+        self.set_state('last_sync', str(started))
+        return counts
+
+    def fetch_model(self, uid):
+        try:
+            return self.fetch(f'{SKETCHFAB_API_URL}/models/{uid}')
+        except (requests.RequestException, ValueError):
+            return None  # Checked again on the next sync
+
+    def look_up(self, uid):
+        """
+        Fetch a single model. Returns (model, False) when it exists, (None, True) when the API
+        answers 404 and (None, False) when that can't be told right now.
+        """
+        headers = {'Authorization': f'Token {self.api_key}'}
+        statuses = []
+
+        def send():
+            self.pacer.wait()
+            response = requests.get(f'{SKETCHFAB_API_URL}/models/{uid}', headers=headers, timeout=30)
+            statuses.append(response.status_code)
+            return response
+
+        outcome, value, category = self.retry_engine.call(send)
+        if outcome == 'success':
+            try:
+                return value.json(), False
+            except ValueError:
+                return None, False
+        return None, bool(statuses) and statuses[-1] == 404
+
+    def store(self, models, seen, counts):
+        """
+        Save fetched models, recording what changed.
+        """
+        now = time.time()
+        with self.connection() as db:
+            for model in models:
+                record = model_record(model)
+                fingerprint = json.dumps(record, sort_keys=True)
+                seen.add(record['uid'])
+                row = db.execute('SELECT fingerprint, removed FROM models WHERE uid = ?', (record['uid'],)).fetchone()
+                if row is None:
+                    change = 'added'
+                elif row['fingerprint'] != fingerprint or row['removed']:
+                    change = 'updated'
+                else:
+                    db.execute('UPDATE models SET last_seen = ? WHERE uid = ?', (now, record['uid']))
+                    continue
+                counts[change] += 1
+                db.execute('INSERT INTO changes (uid, name, change, time) VALUES (?, ?, ?, ?)', (record['uid'], record['name'], change, now))
+                db.execute('INSERT OR REPLACE INTO models (uid, name, created_at, processing, license, tags, fingerprint, '
+                           'first_seen, last_seen, removed) VALUES (?, ?, ?, ?, ?, ?, ?, '
+                           'COALESCE((SELECT first_seen FROM models WHERE uid = ?), ?), ?, 0)',
+                           (record['uid'], record['name'], record['created_at'], record['processing'], record['license'],
+                            json.dumps(record['tags']), fingerprint, record['uid'], now, now))
+
+    def mark_removed(self, seen, started, counts):
+        """
+        Mark cached models that a full listing didn't return as removed from the account.
+
+        Every such model is looked up on its own first. Pages are fetched ahead by offset, so a
+        model deleted on the website during the sync shifts the listing and another one is missed.
+        Only models the API answers 404 for are marked, the ones it still has are stored.
+        """
+        missing = [(row['uid'], row['name']) for row in self.connection().execute(
+            'SELECT uid, name FROM models WHERE removed = 0 AND first_seen < ?', (started,)) if row['uid'] not in seen]
+        gone = []
+        for uid, name in missing:
+            model, deleted = self.look_up(uid)
+            if deleted:
+                gone.append((uid, name))
+            elif model is not None:
+                self.store([model], seen, counts)
+        with self.connection() as db:
+            db.executemany('UPDATE models SET removed = 1 WHERE uid = ?', [(uid,) for uid, name in gone])
+            db.executemany("INSERT INTO changes (uid, name, change, time) VALUES (?, ?, 'removed', ?)",
+                           [(uid, name, time.time()) for uid, name in gone])
+        return len(gone)
+
+    def changes_since(self, since):
+        """
+        Return the models added, changed or removed after a point in time.
+        """
+        return [dict(row) for row in self.connection().execute('SELECT * FROM changes WHERE time > ? ORDER BY id', (since,))]
+
+    def models(self):
+        """
+        Return every cached model that is still on the account.
+        """
+        models = []
+        for row in self.connection().execute('SELECT * FROM models WHERE removed = 0 ORDER BY created_at'):
+            model = dict(row)
+            model['tags'] = json.loads(model['tags'])
+            models.append(model)
+        return models
+
+    def reconcile(self, folder_paths, metadata=None, stuck_after=3600):
+        """
+        Compare local model folders with the cached account models.
+
+        Folders are matched to models by their upload name. When metadata is given, only models
+        with its license and tags count as a match. Returns the number of matched folders and a
+        list of issues: missing, duplicate, metadata mismatch, stuck in processing and processing failed.
+        """
+        by_name = {}
+        for model in self.models():
+            by_name.setdefault(model['name'], []).append(model)
+
+        issues = []
+        matched = 0
+        for folder_path in folder_paths:
+            name = upload_name(folder_path)
+            candidates = by_name.get(name, [])
+            if not candidates:
+                issues.append({'issue': 'Missing', 'name': name, 'folder': folder_path, 'uids': [],
+                               'detail': "Not on the account"})
+                continue
+            matching = [model for model in candidates if self.matches_metadata(model, metadata)]
+            if not matching:
+                issues.append({'issue': 'Metadata mismatch', 'name': name, 'folder': folder_path,
+                               'uids': [model['uid'] for model in candidates],
+                               'detail': f"License {candidates[0]['license']}, {len(candidates[0]['tags'])} tags"})
+                continue
+            matched += 1
+            if len(matching) > 1:
+                # Keep the oldest model that processed fine, the others are leftovers of repeated uploads
+                keep = min(matching, key=lambda model: (model['processing'] != 'SUCCEEDED', model['created_at'] or ''))
+                issues.append({'issue': 'Duplicate', 'name': name, 'folder': folder_path,
+                               'uids': [model['uid'] for model in matching if model is not keep],
+                               'detail': f"{len(matching)} copies, keep {keep['uid']}"})
+
+        now = datetime.utcnow()
+        for models in by_name.values():
+            for model in models:
+                if model['processing'] == 'FAILED':
+                    issues.append({'issue': 'Processing failed', 'name': model['name'], 'folder': None,
+                                   'uids': [model['uid']], 'detail': "Processing failed on Sketchfab"})
+                elif model['processing'] not in FINAL_PROCESSING and model['created_at']:
+                    age = (now - created_time(model['created_at'])).total_seconds()
+                    if age > stuck_after:
+                        issues.append({'issue': 'Stuck', 'name': model['name'], 'folder': None, 'uids': [model['uid']],
+                                       'detail': f"{model['processing'] or 'Unknown'} for {int(age // 3600)}h"})
+        return {'folders': len(folder_paths), 'matched': matched, 'issues': issues}
+
+    @staticmethod
+    def matches_metadata(model, metadata):
+        if not metadata:
+            return True
+        if metadata.get('license') and model['license'] != metadata['license']:
+            return False
+        wanted = {slugify_tag(tag) for tag in metadata.get('tags') or []} - {''}
+        return wanted <= {slugify_tag(tag) for tag in model['tags']}
@@ -0,0 +1,200 @@
+import json
+import sqlite3
+import threading
+import time
+
+from scheduler import STRIDE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT NOT NULL,
+    batch_name TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 1,
+    folder_path TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_expires REAL,
+    first_leased REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    model_name TEXT,
+    status TEXT,
+    progress TEXT,
+    patch_status TEXT,
+    summary TEXT,
+    updated REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, batch_id);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL DEFAULT 1,
+    pass REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scheduler (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    virtual_time REAL NOT NULL
+);
+INSERT OR IGNORE INTO scheduler (id, virtual_time) VALUES (1, 0);
+"""
+VERSION_INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_version ON jobs (version);
+CREATE INDEX IF NOT EXISTS jobs_batch_version ON jobs (batch_id, version);
+"""
+# Every write stamps the rows it changes with the next version. The write lock makes the versions
+# increase in commit order, unlike the clocks of the hosts sharing the file.
+NEXT_VERSION = '(SELECT COALESCE(MAX(version), 0) + 1 FROM jobs)'
+
+
+class JobQueue:
+    """
+    Shared, lease-based queue of model jobs backed by a single SQLite file.
+
+    Workers lease a job for lease_seconds and keep extending the lease with heartbeats while they
+    work on it. A job whose lease ran out (the worker died or lost the file share) goes back to
+    the queue, after max_attempts leases it is marked failed.
+
+    Leases are handed to batches by stride scheduling, the same way FairLimiter hands out slots:
+    every batch has a pass value that advances by STRIDE / priority per leased job, and a batch
+    that had nothing queued for a while rejoins at the pass of the last lease.
+
+    Every change to a job gives it a new version number, the GUI follows the progress of a batch
+    by asking for jobs with a version above the last one it saw.
+
+    This is the reference implementation that needs no external service. Several hosts can share
+    it through a network drive, as long as the share supports file locking.
+    """
+    def __init__(self, path, lease_seconds=120, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.local = threading.local()
+        db = self.connection()
+        db.executescript(SCHEMA)
+        if 'version' not in {row['name'] for row in db.execute('PRAGMA table_info(jobs)')}:
+            db.execute('ALTER TABLE jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 0')  # Queue file of an older release
+        db.executescript(VERSION_INDEXES)
+        # Batches queued by an older release have no pass yet
+        db.execute('INSERT OR IGNORE INTO batches (batch_id, priority, pass) '
+                   'SELECT batch_id, MAX(priority), 0 FROM jobs GROUP BY batch_id')
+
+    def connection(self):
+        """
+        Return the SQLite connection of the calling thread.
+        """
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self.local.db = db
+        return db
+
+    def enqueue_batch(self, batch):
+        """
+        Add every pending folder of a batch as a queued job.
+        """
+        now = time.time()
+        rows = [(batch.id, batch.name, batch.priority, folder_path, json.dumps(batch.metadata), now)
+                for folder_path in batch.pending]
+        db = self.connection()
+        db.execute('BEGIN IMMEDIATE')
+        db.execute('INSERT OR IGNORE INTO batches (batch_id, priority, pass) '
+                   'SELECT ?, ?, virtual_time FROM scheduler', (batch.id, batch.priority))
+        db.executemany('INSERT INTO jobs (batch_id, batch_name, priority, folder_path, metadata, updated, version) '
+                       f'VALUES (?, ?, ?, ?, ?, ?, {NEXT_VERSION})', rows)
+        db.execute('COMMIT')
+        batch.pending.clear()
+        return len(rows)
+
+    def lease(self, worker):
+        """
+        Hand the next job to a worker, or return None when nothing is queued.
+
+        The next job comes from the queued batch with the lowest pass, so small urgent batches
+        are not stuck behind a large backlog and a new batch doesn't hold up the running ones.
+        """
+        now = time.time()
+        db = self.connection()
+        db.execute('BEGIN IMMEDIATE')  # Takes the write lock so two workers never lease the same job
+        try:
+            self._requeue_expired(db, now)
+            virtual_time = db.execute('SELECT virtual_time FROM scheduler').fetchone()[0]
+            batch = db.execute(
+                "SELECT batch_id, priority, MAX(pass, ?) AS pass FROM batches WHERE EXISTS "
+                "(SELECT 1 FROM jobs WHERE jobs.state = 'queued' AND jobs.batch_id = batches.batch_id) "
+                "ORDER BY 3, rowid LIMIT 1", (virtual_time,)).fetchone()
+            if batch is None:
+                db.execute('COMMIT')
+                return None
+            db.execute('UPDATE scheduler SET virtual_time = ?', (batch['pass'],))
+            db.execute('UPDATE batches SET pass = ? WHERE batch_id = ?',
+                       (batch['pass'] + STRIDE / max(1, batch['priority']), batch['batch_id']))
+            job = db.execute("SELECT * FROM jobs WHERE batch_id = ? AND state = 'queued' ORDER BY id LIMIT 1",
+                             (batch['batch_id'],)).fetchone()
+            db.execute("UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                       f"first_leased = COALESCE(first_leased, ?), updated = ?, version = {NEXT_VERSION} WHERE id = ?",
+                       (worker, now + self.lease_seconds, now, now, job['id']))
+            job = dict(db.execute('SELECT * FROM jobs WHERE id = ?', (job['id'],)).fetchone())
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        job['metadata'] = json.loads(job['metadata'])
+        return job
+
+    def heartbeat(self, worker, job_ids):
+        """
+        Record that a worker is alive and extend the leases of the jobs it is working on.
+        """
+        now = time.time()
+        db = self.connection()
+        db.execute('BEGIN IMMEDIATE')
+        db.execute('INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)', (worker, now))
+        db.executemany("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                       [(now + self.lease_seconds, job_id, worker) for job_id in job_ids])
+        db.execute('COMMIT')
+
+    def report(self, job_id, worker, model_name, status, progress, patch_status, summary):
+        """
+        Store the latest progress of a job so the GUI can show it.
+        """
+        self.connection().execute(
+            'UPDATE jobs SET model_name = ?, status = ?, progress = ?, patch_status = ?, summary = ?, updated = ?, '
+            f'version = {NEXT_VERSION} WHERE id = ? AND worker = ?',
+            (model_name, status, progress, patch_status, summary, time.time(), job_id, worker))
+
+    def complete(self, job_id, worker, state):
+        """
+        Mark a leased job as 'done' or 'failed'. Returns False when the lease was lost to another worker.
+        """
+        cursor = self.connection().execute(
+            f"UPDATE jobs SET state = ?, lease_expires = NULL, updated = ?, version = {NEXT_VERSION} "
+            "WHERE id = ? AND worker = ? AND state = 'leased'",
+            (state, time.time(), job_id, worker))
+        return cursor.rowcount == 1
+
+    def changes_since(self, batch_id, since_version):
+        """
+        Return jobs of a batch changed after the given version, for refreshing the status tab.
+        """
+        return [dict(row) for row in self.connection().execute(
+            'SELECT * FROM jobs WHERE batch_id = ? AND version > ? ORDER BY version', (batch_id, since_version))]
+
+    def counts(self, batch_id):
+        """
+        Count the jobs of a batch by state.
+        """
+        rows = self.connection().execute('SELECT state, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY state', (batch_id,))
+        return {state: count for state, count in rows}
+
+    def _requeue_expired(self, db, now):
+        db.execute("UPDATE jobs SET state = 'failed', summary = 'Aborted', status = 'Worker lost', updated = ?, "
+                   f"version = {NEXT_VERSION} WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                   (now, now, self.max_attempts))
+        db.execute("UPDATE jobs SET state = 'queued', worker = NULL, lease_expires = NULL, status = 'Requeued', updated = ?, "
+                   f"version = {NEXT_VERSION} WHERE state = 'leased' AND lease_expires < ?", (now, now))
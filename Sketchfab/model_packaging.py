@@ -0,0 +1,84 @@
+import os
+import time
+import zipfile
+import zlib
+
+from watcher import is_model_file
+
+SAMPLE_SIZE = 64 * 1024  # Bytes read from each of the sampled spots of a file
+ALREADY_COMPRESSED = ('.zip',)
+DEFAULT_UPLOAD_BYTES_PER_SECOND = 2 * 1024 * 1024
+MIN_DEFLATE_GAIN = 0.02  # Files that shrink less than this are stored as they are
+
+
+def model_files(folder_path, exclude=None):
+    """
+    List the model files of a folder and its subfolders that go into an upload.
+    Pass the path of the archive being written as exclude so it doesn't pack itself.
+    """
+    found = []
+    for root, dirs, files in os.walk(folder_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            if is_model_file(file) and file_path != exclude:
+                found.append(file_path)
+    return found
+
+
+def estimate_compression(file_path, size):
+    """
+    Estimate how well a file deflates by compressing samples from its start, middle and end.
+    Returns (compressed size / original size, compression speed in bytes per second).
+    """
+    offsets = sorted({0, max(0, size // 2 - SAMPLE_SIZE // 2), max(0, size - SAMPLE_SIZE)})
+    raw = compressed = 0
+    started = time.perf_counter()
+    with open(file_path, 'rb') as sample_file:
+        for offset in offsets:
+            sample_file.seek(offset)
+            chunk = sample_file.read(SAMPLE_SIZE)
+            raw += len(chunk)
+            compressed += len(zlib.compress(chunk, 6))
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    if not raw:
+        return 1.0, float('inf')
+    return min(1.0, compressed / raw), raw / elapsed
+
+
+def choose_compression(file_path, upload_bytes_per_second):
+    """
+    Pick ZIP_DEFLATED only when the time saved on the upload is larger than the time spent compressing.
+    """
+    if file_path.lower().endswith(ALREADY_COMPRESSED):
+        return zipfile.ZIP_STORED
+    size = os.path.getsize(file_path)
+    ratio, bytes_per_second = estimate_compression(file_path, size)
+    if ratio > 1 - MIN_DEFLATE_GAIN:
+        return zipfile.ZIP_STORED
+    compress_seconds = size / bytes_per_second
+    saved_seconds = size * (1 - ratio) / upload_bytes_per_second
+    return zipfile.ZIP_DEFLATED if saved_seconds > compress_seconds else zipfile.ZIP_STORED
+
+
+def package_folder(folder_path, zip_name, upload_bytes_per_second=None):
+    """
+    Prepare the file to upload for a model folder.
+
+    A folder holding a single .glb or .zip is uploaded as it is. Otherwise the model files are
+    zipped, each one stored or deflated depending on what is faster to zip and upload.
+    Returns (file path, whether the file is a temporary archive that should be removed).
+    Raises ValueError when the folder has no model files, an empty archive is never uploaded.
+    """
+    zip_path = os.path.join(folder_path, zip_name)
+    files = model_files(folder_path, exclude=zip_path)
+    if not files:
+        raise ValueError(f"No .zip or .glb files found in {folder_path}")
+    if len(files) == 1:
+        return files[0], False
+
+    upload_bytes_per_second = upload_bytes_per_second or DEFAULT_UPLOAD_BYTES_PER_SECOND
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for file_path in files:
+            compression = choose_compression(file_path, upload_bytes_per_second)
+            zipf.write(file_path, arcname=os.path.relpath(file_path, folder_path), compress_type=compression)
+    return zip_path, True
@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from time import sleep, monotonic
+
+import requests
+
+from model_packaging import package_folder
+from scheduler import FairLimiter
+from simulator import packaged_size
+from watcher import TEMP_ARCHIVE_PREFIX
+
+SKETCHFAB_API_URL = 'https://api.sketchfab.com/v3'
+CLOCK_SKEW = timedelta(seconds=60)  # Allowed difference between our clock and Sketchfab's createdAt
+
+
+def clean_and_convert_price(input_price):
+    """
+    Converts a price input to the required whole number format by multiplying by 100.
+    """
+    if input_price is None:
+        return None
+    # Handle string input with commas as decimal separators
+    if isinstance(input_price, str):
+        input_price = input_price.replace(',', '.')  # Replace comma with dot for decimal
+        try:
+            price_float = float(input_price)
+        except ValueError:
+            return None
+    elif isinstance(input_price, (int, float)):
+        price_float = float(input_price)  # Ensure it's a float if not already
+    else:
+        return None
+
+    # Convert to integer by multiplying by 100
+    price_int = int(round(price_float * 100))
+    if price_int < 399:  # Ensure the price meets the minimum required value
+        return None
+    return price_int
+
+
+class UploadPipeline:
+    """
+    Package, upload, poll and patch model folders, without any GUI.
+
+    The progress of every model goes to report(batch, model_name, status, progress, patch_status, summary).
+    The GUI shows it in the status tab of the batch, a worker writes it to the job queue.
+    """
+    def __init__(self, retry_engine, timings, events, report, poll_limiter=None, patch_limiter=None):
+        self.retry_engine = retry_engine
+        self.timings = timings
+        self.events = events
+        self.report = report
+        self.poll_limiter = poll_limiter or FairLimiter(6)
+        self.patch_limiter = patch_limiter or FairLimiter(6)
+        self.claimed_uids = set()  # Models already taken by an upload of this pipeline
+        self.claim_lock = threading.Lock()
+
+    def claim(self, uid):
+        """
+        Tie a model to one upload. Returns False when another upload already has it.
+        """
+        with self.claim_lock:
+            if uid in self.claimed_uids:
+                return False
+            self.claimed_uids.add(uid)
+            return True
+
+    def update_status(self, message, level='info', **fields):
+        """
+        Record a status message in the event log.
+        """
+        self.events.log(message, level, **fields)
+
+    def upload_model(self, api_key, file_path, data, created_after=None):
+        """
+        Upload model to Sketchfab with an initial 'free-standard' license if required.
+
+        Pass created_after when an earlier attempt at this model may have gone through, e.g. a job
+        taken over from a dead worker. A model with the same name created since then, and not
+        taken by another upload, is used instead of uploading again.
+        """
+        original_license = data.get('license')  # Save the original license
+        if len(data['name']) > 48:
+            data['name'] = data['name'][:48]  # Truncate to the maximum allowed length
+
+        if created_after is not None:
+            try:
+                existing_uid = self.find_uploaded_model(api_key, data['name'], created_after)
+            except requests.RequestException:
+                existing_uid = None
+            if existing_uid:
+                self.update_status(f"{data['name']} was already uploaded by an earlier attempt, not uploading it again.", 'warning', uid=existing_uid)
+                return existing_uid, f'{SKETCHFAB_API_URL}/models/{existing_uid}', 'success', original_license, None
+
+        # Temporarily set license to 'free-st' for initial upload if it's 'st' or 'ed'
+        if original_license in ['st', 'ed']:
+            data['license'] = 'free-st'
+
+        sleep(5)
+        model_endpoint = f'{SKETCHFAB_API_URL}/models'
+        headers = {'Authorization': f'Token {api_key}'}
+        # Models created before the first attempt can't be the result of our own attempts
+        started_at = datetime.utcnow() - CLOCK_SKEW
+
+        def send():
+            with open(file_path, 'rb') as file:  # Reopened on every attempt so the upload starts from the beginning
+                files = {'modelFile': (os.path.basename(file_path), file)}
+                return requests.post(model_endpoint, headers=headers, files=files, data=data, timeout=(30, 600))
+
+        try:
+            upload_started = monotonic()
+            outcome, value, category = self.retry_engine.call(
+                send, check_existing=lambda: self.find_uploaded_model(api_key, data['name'], started_at))
+        except OSError as e:
+            return None, None, 'error', original_license, str(e)
+        # Restore the original license for return
+        data['license'] = original_license
+        if outcome == 'success':
+            self.timings.record('upload', monotonic() - upload_started, os.path.getsize(file_path))
+            model_url = value.headers.get('Location')
+            model_uid = model_url.split('/')[-1]
+            if not self.claim(model_uid):
+                self.update_status(f"Model {model_uid} of {data['name']} was also taken as the result of another upload.", 'warning', uid=model_uid)
+            return model_uid, model_url, 'success', original_license, None
+        if outcome == 'recovered':
+            self.update_status(f"Upload of {data['name']} failed ambiguously but the model exists, not uploading it again.", 'warning', uid=value)
+            return value, f'{SKETCHFAB_API_URL}/models/{value}', 'success', original_license, None
+        return None, None, 'error', original_license, value
+
+    def find_uploaded_model(self, api_key, name, created_after):
+        """
+        Look for a model with the given name created after a point in time, going through the
+        account models newest first until they are older than that. Models already taken by
+        another upload of this pipeline, e.g. a folder with the same name, are passed over.
+        Returns the UID, claimed for the caller, or None.
+        """
+        headers = {'Authorization': f'Token {api_key}'}
+        url = f'{SKETCHFAB_API_URL}/me/models'
+        params = {'sort_by': '-createdAt', 'count': 24}
+        while url:
+            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response.raise_for_status()
+            page = response.json()
+            for model in page.get('results', []):
+                created_at = model.get('createdAt')
+                if not created_at:
+                    continue
+                if datetime.fromisoformat(created_at.rstrip('Z')).replace(tzinfo=None) < created_after:
+                    return None  # Newest first, the rest is older still
+                if model.get('name') == name and self.claim(model['uid']):
+                    return model['uid']
+            url, params = page.get('next'), None  # The next link carries the query
+        return None
+
+    def patch_model(self, batch, uid, original_license, price):
+        """
+        Patch the model's license and price after initial upload.
+        """
+        with self.patch_limiter.slot(batch):
+            # Added static delay to manage the rate of patch operations
+            sleep(30)
+
+            headers = {'Authorization': f'Token {batch.api_key}', 'Content-Type': 'application/json'}
+            patch_data = {'license': original_license}
+
+            if original_license in ['st', 'ed']:  # If the license type requires a price
+                price = clean_and_convert_price(price)
+                if price is None:
+                    self.update_status(f"Invalid price for model {uid}. Patch aborted.", 'error', uid=uid)
+                    return 'error'
+                patch_data['price'] = price
+
+            patch_endpoint = f'{SKETCHFAB_API_URL}/models/{uid}'
+            # PATCH sets absolute values, so repeating it after an ambiguous failure is safe
+            patch_started = monotonic()
+            outcome, value, category = self.retry_engine.call(
+                lambda: requests.patch(patch_endpoint, headers=headers, data=json.dumps(patch_data), timeout=30))
+            if outcome == 'success':
+                self.timings.record('patch', monotonic() - patch_started)
+                self.update_status(f"Model {uid} patched successfully.", uid=uid)
+                return 'success'
+            self.update_status(f"Failed to patch model {uid}: {value}", 'error', uid=uid, category=category)
+            return 'error'
+
+    def package_model_folder(self, folder_path, zip_name):
+        """
+        Prepare the upload file of a folder, a lone .glb or .zip is used directly instead of zipping it.
+        Returns the file path and whether it is a temporary archive.
+        """
+        seconds_per_mb = self.timings.seconds_per_mb('upload')
+        upload_bytes_per_second = 1024 * 1024 / seconds_per_mb if seconds_per_mb else None
+        return package_folder(folder_path, zip_name, upload_bytes_per_second)
+
+    def poll_processing_status(self, batch, model_url, model_name, uid, original_license, price, size_bytes=None):
+        """
+        Poll the processing status of an uploaded model and patch it once processing succeeded.
+        Returns 'done' or 'failed' together with a short detail.
+        """
+        self.events.log(f"Polling status for {model_name}", 'debug', model=model_name, uid=uid, url=model_url)
+        headers = {'Authorization': f'Token {batch.api_key}'}
+        max_retries = 200
+        retry_timeout = 30
+        retry_count = 0
+        polling_started = monotonic()
+        last_unfinished = 0.0  # When processing was last seen unfinished, relative to polling_started
+
+        while retry_count < max_retries:
+            sleep(retry_timeout)
+            retry_count += 1
+            with self.poll_limiter.slot(batch):
+                outcome, value, category = self.retry_engine.call(lambda: requests.get(model_url, headers=headers, timeout=30))
+            polled = monotonic() - polling_started
+            if outcome != 'success':
+                self.report(batch, model_name, 'Upload Failed', value, 'Patch Error', 'Aborted')
+                return 'failed', value
+
+            try:
+                processing_status = value.json()['status']['processing']
+            except (ValueError, KeyError, TypeError):
+                continue  # Malformed answer, ask again on the next round
+            self.events.log(f"Processing status for {model_name}: {processing_status}", 'debug', model=model_name, uid=uid)
+
+            if processing_status == 'SUCCEEDED':
+                # It finished somewhere between the last two polls, the simulator adds the poll wait itself
+                self.timings.record('processing', (last_unfinished + polled) / 2, size_bytes)
+                self.events.log(f"Processing succeeded for {model_name}", model=model_name, uid=uid, license=original_license, price=price)
+                self.report(batch, model_name, 'Complete', 'Processing Completed', 'Starting...', 'Fully Completed')
+                sleep(5)
+                if original_license in ['st', 'ed']:
+                    patch_result = self.patch_model(batch, uid, original_license, price)
+                    patch_status = 'Patch Successful' if patch_result == 'success' else 'Patch Failed'
+                    self.report(batch, model_name, 'Complete', 'Processing Completed', patch_status, 'Fully Completed')
+                    return ('done' if patch_result == 'success' else 'failed'), patch_status
+                self.report(batch, model_name, 'Upload Successful', 'Completed', 'No Patch Required', 'Fully Completed')
+                return 'done', 'No Patch Required'
+            elif processing_status == 'FAILED':
+                self.report(batch, model_name, 'Processing Failed', processing_status, 'Patch Not Attempted', 'Aborted')
+                return 'failed', 'Processing Failed'
+            last_unfinished = polled
+
+        self.report(batch, model_name, 'Upload Failed', 'Max retries reached', 'Max retries reached', 'Aborted')
+        return 'failed', 'Max retries reached'
+
+    def upload_folder(self, batch, folder_path, created_after=None):
+        """
+        Package and upload a folder containing a model.
+        Returns (uid, model url, original license, upload size) or None when the upload failed.
+        """
+        try:
+            metadata = batch.metadata
+            model_name = os.path.basename(folder_path)
+            self.report(batch, model_name, 'Uploading...', 'In progress', 'Patch Not Started', 'In Progress')
+
+            zip_name = f"{TEMP_ARCHIVE_PREFIX}{uuid.uuid4().hex}.zip"
+            zip_started = monotonic()
+            try:
+                upload_file_path, temporary = self.package_model_folder(folder_path, zip_name)
+            except ValueError as e:
+                self.report(batch, model_name, 'Upload Failed', str(e), 'Failed', 'Aborted')
+                return None
+            upload_size = os.path.getsize(upload_file_path)
+            if temporary:
+                # A single model file is uploaded as it is, that's no zip timing
+                self.timings.record('zip', monotonic() - zip_started, packaged_size(folder_path))
+
+            data = dict(metadata, name=model_name)
+
+            # Retries, backoff and duplicate checks happen inside upload_model
+            try:
+                uid, url, status, original_license, error_message = self.upload_model(batch.api_key, upload_file_path, data, created_after)
+            finally:
+                # Only remove archives we created, never the model file of a direct upload
+                if temporary and os.path.exists(upload_file_path):
+                    os.remove(upload_file_path)
+            if status != 'success':
+                self.report(batch, model_name, 'Upload Failed', error_message or 'Error during upload', 'Failed', 'Aborted')
+                return None
+            self.events.log(f"Uploaded {model_name}", model=model_name, uid=uid, license=original_license, batch=batch.id)
+            self.report(batch, model_name, 'Upload Successful', 'Processing...', 'Patch Not Started', 'In Progress')
+            return uid, url, original_license, upload_size
+        finally:
+            self.events.log(f"Finished upload of {folder_path}", 'debug', folder=folder_path, batch=batch.id)
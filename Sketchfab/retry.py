@@ -0,0 +1,244 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+# Error categories
+RATE_LIMIT = 'rate_limit'
+TRANSIENT = 'transient'  # Network errors and timeouts
+SERVER = 'server'  # 5xx responses
+PERMANENT = 'permanent'  # 4xx responses other than 429, retrying will not help
+RETRYABLE = (RATE_LIMIT, TRANSIENT, SERVER)
+
+
+def classify_response(response):
+    """
+    Classify a failed HTTP response into one of the error categories.
+    """
+    if response.status_code == 429:
+        return RATE_LIMIT
+    if response.status_code >= 500:
+        return SERVER
+    return PERMANENT
+
+
+def classify_exception(exc):
+    """
+    Classify an exception raised by requests into one of the error categories.
+    """
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return TRANSIENT
+    return PERMANENT
+
+
+def is_ambiguous(category, exc=None):
+    """
+    Check whether the server may have acted on a request even though it failed.
+    A connect timeout never reached the server, a read timeout or a 5xx might have.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return False
+    return category in (TRANSIENT, SERVER)
+
+
+def retry_after_seconds(response):
+    """
+    Read the Retry-After header of a response, None if it is missing or not a number of seconds.
+    """
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Pause every request of the pipeline while the API is failing broadly.
+
+    The breaker opens after failure_threshold failures within window seconds and stays open
+    for cooldown seconds. After that it is half open, a single probe request is let through
+    while everybody else keeps waiting. The breaker closes when the probe succeeds and opens
+    again straight away when it fails. A probe that reports nothing within probe_timeout
+    seconds is given up and the next caller probes instead.
+    """
+    def __init__(self, failure_threshold=5, window=60, cooldown=60, probe_timeout=900, on_state_change=None):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self.on_state_change = on_state_change
+        self.failures = deque()
+        self.open_until = 0
+        self.half_open = False
+        self.probe = None  # (thread id, start time) of the request testing a half open breaker
+        self.condition = threading.Condition()
+
+    def wait(self, probe=True):
+        """
+        Block the calling thread while the breaker is open.
+
+        When the breaker is half open the first caller becomes the probe and returns, the others
+        wait for its result. Pass probe=False from threads that only start work and don't send a
+        request themselves, they return once a probe could be sent.
+        """
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.open_until > now:
+                    self.condition.wait(self.open_until - now)
+                    continue
+                if not self.half_open:
+                    return
+                if self.probe is not None and now - self.probe[1] > self.probe_timeout:
+                    self.probe = None  # The probe never reported back
+                if self.probe is None:
+                    if probe:
+                        self.probe = (threading.get_ident(), now)
+                    return
+                if self.probe[0] == threading.get_ident():
+                    return  # The probe retrying its own request
+                self.condition.wait(self.probe[1] + self.probe_timeout - now)
+
+    def is_open(self):
+        """
+        Check whether requests are currently paused.
+        """
+        with self.condition:
+            return self.open_until > time.monotonic()
+
+    def pause(self, seconds, reason):
+        """
+        Pause every caller for a while without counting a failure, e.g. when rate limited.
+        """
+        with self.condition:
+            self.probe = None  # The API answered, a new probe may go once the pause is over
+            until = time.monotonic() + seconds
+            if until <= self.open_until:
+                return
+            self.open_until = until
+        self._notify(True, reason)
+
+    def record_success(self):
+        """
+        Clear the failure history after the API answered normally.
+        """
+        with self.condition:
+            self.failures.clear()
+            was_half_open, self.half_open = self.half_open, False
+            self.probe = None
+            self.condition.notify_all()
+        if was_half_open:
+            self._notify(False, 'API is responding again')
+
+    def record_failure(self, reason):
+        """
+        Count a failure and open the breaker once too many failures happened within the window.
+        """
+        now = time.monotonic()
+        with self.condition:
+            self.failures.append(now)
+            while self.failures and now - self.failures[0] > self.window:
+                self.failures.popleft()
+            if self.open_until > now:
+                return
+            if not self.half_open and len(self.failures) < self.failure_threshold:
+                return
+            self.open_until = now + self.cooldown
+            self.half_open = True
+            self.probe = None
+            self.condition.notify_all()
+        self._notify(True, reason)
+
+    def abandon_probe(self):
+        """
+        Give up the probe of the calling thread without a verdict, another caller probes instead.
+        """
+        with self.condition:
+            if self.probe is not None and self.probe[0] == threading.get_ident():
+                self.probe = None
+                self.condition.notify_all()
+
+    def _notify(self, opened, reason):
+        if self.on_state_change:
+            self.on_state_change(opened, reason)
+
+
+class RetryEngine:
+    """
+    Send a request with jittered exponential backoff until it succeeds or fails permanently.
+
+    For requests that are not safe to repeat, like creating a model, pass check_existing.
+    It is called after an ambiguous failure and before the request is sent again, if it
+    returns anything other than None the earlier attempt went through and that value is used.
+    """
+    def __init__(self, breaker=None, max_attempts=6, base_delay=2, max_delay=120):
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """
+        Full-jitter exponential backoff for the given attempt number.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, send, check_existing=None):
+        """
+        Run send() until it returns a 2xx response.
+
+        Returns (outcome, value, category): ('success', response, None), ('recovered', value, category)
+        when check_existing found the result of an earlier attempt, or ('failed', message, category).
+        """
+        detail, category = 'Unknown error occurred', None
+        ambiguous = False
+        for attempt in range(self.max_attempts):
+            self.breaker.wait()
+            if ambiguous and check_existing:
+                try:
+                    existing = check_existing()
+                except requests.RequestException:
+                    existing = None  # Could not verify, sending again is the lesser evil
+                if existing is not None:
+                    return 'recovered', existing, category
+
+            exc = None
+            try:
+                response = send()
+            except requests.RequestException as e:
+                exc, response = e, None
+                category, detail = classify_exception(e), f"Network error: {e}"
+            else:
+                if 200 <= response.status_code < 300:
+                    self.breaker.record_success()
+                    return 'success', response, None
+                category = classify_response(response)
+                detail = f"{response.status_code} - {response_detail(response)}"
+
+            if category not in RETRYABLE:
+                if response is not None:
+                    self.breaker.record_success()  # The API is up, it just refused this request
+                else:
+                    self.breaker.abandon_probe()  # The request never reached the API, it tells nothing
+                return 'failed', detail, category
+
+            ambiguous = ambiguous or is_ambiguous(category, exc)
+            if category == RATE_LIMIT:
+                delay = retry_after_seconds(response) or self.backoff(attempt + 2)
+                self.breaker.pause(delay, f"Rate limited by the API, pausing for {delay:.0f} seconds")
+            else:
+                self.breaker.record_failure(detail)
+                time.sleep(self.backoff(attempt))
+        return 'failed', f"Max retries reached: {detail}", category
+
+
+def response_detail(response):
+    """
+    Extract the error message of an API response.
+    """
+    try:
+        return response.json().get('detail', response.text)
+    except (ValueError, AttributeError):
+        return response.text
@@ -0,0 +1,199 @@
+import itertools
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from time import sleep
+
+STRIDE = 1000000  # Stride scheduling constant, a batch advances by STRIDE / priority per job
+PRIORITIES = {'Normal': 1, 'High': 5, 'Urgent': 20}
+
+
+class Batch:
+    """
+    A set of model folders uploaded with the same metadata and shown in one status tab.
+    """
+    def __init__(self, name, folder_paths, metadata, priority=1, continuous=False, api_key=None, batch_id=None):
+        self.id = batch_id or uuid.uuid4().hex[:8]
+        self.name = name
+        self.tab_name = f"{name} [{self.id}]"
+        self.metadata = metadata
+        self.api_key = api_key
+        self.priority = max(1, priority)
+        self.continuous = continuous  # Watched folders keep adding models, the batch never runs dry
+        self.pending = deque(folder_paths)
+        self.total = len(folder_paths)
+        self.active = 0
+        self.done = 0
+
+    def is_finished(self):
+        """
+        Check whether every model of the batch went through the upload stage.
+        """
+        return not self.continuous and not self.pending and not self.active
+
+
+class FairLimiter:
+    """
+    Limit how many jobs of a stage run at once and hand free slots to batches by stride scheduling.
+
+    Each batch waiting for a slot has a pass value, the lowest pass gets the next slot and then
+    advances by STRIDE / priority. A batch with priority 20 therefore gets twenty slots for every
+    one of a priority 1 batch, while the larger batch still keeps moving. A batch that stopped
+    waiting for a while rejoins at the pass of the last granted slot, so idle time earns no credit.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.in_use = 0
+        self.passes = {}
+        self.virtual_time = 0
+        self.waiting = {}
+        self.condition = threading.Condition()
+        self.order = itertools.count()  # Tie breaker, older waiters first
+
+    def acquire(self, batch):
+        """
+        Wait for a slot on behalf of a batch.
+        """
+        with self.condition:
+            if batch.id not in self.waiting:
+                self.passes[batch.id] = max(self.passes.get(batch.id, 0), self.virtual_time)
+            self.waiting.setdefault(batch.id, deque()).append(next(self.order))
+            while not (self.in_use < self.capacity and self._next_batch() == batch.id):
+                self.condition.wait()
+            self.waiting[batch.id].popleft()
+            if not self.waiting[batch.id]:
+                del self.waiting[batch.id]
+            self.in_use += 1
+            self.virtual_time = self.passes[batch.id]
+            self.passes[batch.id] += STRIDE / batch.priority
+            self.condition.notify_all()
+
+    def release(self):
+        """
+        Free a slot taken with acquire.
+        """
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, batch):
+        """
+        Hold a slot for the duration of a with block.
+        """
+        self.acquire(batch)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _next_batch(self):
+        waiting = [(self.passes[batch_id], tickets[0], batch_id) for batch_id, tickets in self.waiting.items()]
+        return min(waiting)[2] if waiting else None
+
+
+class BatchScheduler:
+    """
+    One scheduler for all batches, sharing the upload, polling and patch capacity between them.
+
+    Upload slots are handed out by a dispatcher thread that always starts the next folder of the
+    batch with the lowest pass value. Polling and patching happen in per-model threads, they
+    take their slots from the shared poll and patch limiters.
+    """
+    def __init__(self, run_job, upload_slots=6, poll_slots=6, patch_slots=6, start_interval=2,
+                 before_start=None, on_batch_done=None):
+        self.run_job = run_job
+        self.upload_slots = upload_slots
+        self.start_interval = start_interval
+        self.before_start = before_start
+        self.on_batch_done = on_batch_done
+        self.poll_limiter = FairLimiter(poll_slots)
+        self.patch_limiter = FairLimiter(patch_slots)
+        self.batches = {}
+        self.passes = {}
+        self.virtual_time = 0
+        self.active_uploads = 0
+        self.condition = threading.Condition()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, batch):
+        """
+        Add a batch. It starts at the pass of the last started job so it neither waits behind
+        the running batches nor gets credit for the time it was not there.
+        """
+        with self.condition:
+            self.passes[batch.id] = self.virtual_time
+            self.batches[batch.id] = batch
+            self.condition.notify_all()
+        return batch
+
+    def add_folder(self, batch, folder_path):
+        """
+        Queue another folder for a batch that is already submitted, used for watched folders.
+        """
+        with self.condition:
+            if not batch.pending:
+                self.passes[batch.id] = max(self.passes[batch.id], self.virtual_time)
+            batch.pending.append(folder_path)
+            batch.total += 1
+            self.condition.notify_all()
+
+    def close(self, batch):
+        """
+        Stop a continuous batch from waiting for more folders.
+        """
+        with self.condition:
+            batch.continuous = False
+        self._finish_if_done(batch)
+
+    def pending_count(self):
+        """
+        Number of folders waiting for an upload slot in all batches.
+        """
+        with self.condition:
+            return sum(len(batch.pending) for batch in self.batches.values())
+
+    def _next_job(self):
+        ready = [batch for batch in self.batches.values() if batch.pending]
+        if not ready or self.active_uploads >= self.upload_slots:
+            return None
+        batch = min(ready, key=lambda b: (self.passes[b.id], b.id))
+        self.virtual_time = self.passes[batch.id]
+        self.passes[batch.id] += STRIDE / batch.priority
+        batch.active += 1
+        self.active_uploads += 1
+        return batch, batch.pending.popleft()
+
+    def _dispatch_loop(self):
+        while True:
+            if self.before_start:
+                self.before_start()
+            with self.condition:
+                job = self._next_job()
+                while job is None:
+                    self.condition.wait()
+                    job = self._next_job()
+            threading.Thread(target=self._run, args=job, daemon=True).start()
+            sleep(self.start_interval)  # Spread the starts so the API doesn't see bursts
+
+    def _run(self, batch, folder_path):
+        try:
+            self.run_job(batch, folder_path)
+        finally:
+            with self.condition:
+                self.active_uploads -= 1
+                batch.active -= 1
+                batch.done += 1
+                self.condition.notify_all()
+            self._finish_if_done(batch)
+
+    def _finish_if_done(self, batch):
+        with self.condition:
+            if not batch.is_finished() or batch.id not in self.batches:
+                return
+            del self.batches[batch.id]
+            del self.passes[batch.id]
+        if self.on_batch_done:
+            self.on_batch_done(batch)
@@ -6,7 +6,7 @@ from cx_Freeze import setup, Executable
 build_exe_options = {
     "packages": [
         "os", "sys", "threading", "zipfile", "json", "random", "tkinter", "requests", "tkinterdnd2", 
-        "customtkinter", "time", "tkfilebrowser", "queue"
+        "customtkinter", "time", "tkfilebrowser", "queue", "sqlite3"
     ],
     "excludes": [],  # Exclude any packages not needed. You might need to adjust this.
     "include_files": []  # Include any non-Python files you use in your application
@@ -22,5 +22,5 @@ setup(
     version="0.1",
     description="A utility to upload models to Sketchfab.",
     options={"build_exe": build_exe_options},
-    executables=[Executable("sketchfab.py", base=base)]
+    executables=[Executable("sketchfab.py", base=base), Executable("worker.py"), Executable("engine.py", base=base)]
 )
@@ -0,0 +1,206 @@
+import heapq
+import json
+import os
+import threading
+
+from model_packaging import model_files
+
+MB = 1024 * 1024
+
+# Seconds per MB, used until real uploads have been timed
+DEFAULT_RATES = {
+    'zip': 0.025,  # About 40 MB/s
+    'upload': 0.5,  # About 2 MB/s
+    'processing': 2.0,
+}
+DEFAULT_PROCESSING_BASE = 60.0  # Seconds of processing every model needs regardless of size
+DEFAULT_PATCH_LATENCY = 2.0
+
+
+class StageTimings:
+    """
+    Keep recent timings of the pipeline stages, persisted to a JSON file between runs.
+
+    Size based stages (zip, upload, processing) store (bytes, seconds) pairs, the others
+    store plain durations.
+    """
+    def __init__(self, path='sketchfab_timings.json', max_samples=200):
+        self.path = path
+        self.max_samples = max_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Load samples recorded by earlier runs.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as timings_file:
+                self.samples = json.load(timings_file)
+        except (OSError, ValueError):
+            self.samples = {}
+
+    def record(self, stage, seconds, size_bytes=None):
+        """
+        Store a timing sample for a stage and save the file.
+        """
+        with self.lock:
+            samples = self.samples.setdefault(stage, [])
+            samples.append([size_bytes, seconds])
+            del samples[:-self.max_samples]
+            try:
+                with open(self.path, 'w', encoding='utf-8') as timings_file:
+                    json.dump(self.samples, timings_file)
+            except OSError:
+                pass  # Timings are only used for estimates
+
+    def seconds_per_mb(self, stage, base=0.0):
+        """
+        Average seconds per MB of a size based stage after taking off a fixed base time per model.
+        """
+        with self.lock:
+            samples = [(size, seconds) for size, seconds in self.samples.get(stage, []) if size]
+        if not samples:
+            return None
+        total_mb = sum(size for size, seconds in samples) / MB
+        total_seconds = sum(max(0.0, seconds - base) for size, seconds in samples)
+        return total_seconds / total_mb if total_mb else None
+
+    def mean(self, stage):
+        """
+        Average duration of a stage, None without samples.
+        """
+        with self.lock:
+            samples = [seconds for size, seconds in self.samples.get(stage, [])]
+        return sum(samples) / len(samples) if samples else None
+
+
+def upload_plan(folder_path):
+    """
+    Return the size of the model files package_folder uploads from a folder and whether it zips them.
+    A folder with a single model file is uploaded as it is.
+    """
+    files = model_files(folder_path)
+    total = 0
+    for file_path in files:
+        try:
+            total += os.path.getsize(file_path)
+        except OSError:
+            pass
+    return total, len(files) > 1
+
+
+def packaged_size(folder_path):
+    """
+    Size of the model files package_folder uploads from a folder.
+    """
+    return upload_plan(folder_path)[0]
+
+
+class BatchSimulator:
+    """
+    Predict how long a batch takes by replaying the upload scheduler against recorded stage timings.
+
+    The model mirrors BatchScheduler running a single batch: six upload slots with starts two
+    seconds apart, the fixed sleep in upload_model, polling every 30 seconds and the patch
+    limiter with its 30 second delay.
+    """
+    def __init__(self, timings, upload_slots=6, patch_slots=6, start_interval=2, upload_delay=5,
+                 poll_interval=30, patch_delay=30, post_processing_delay=5):
+        self.upload_slots = upload_slots
+        self.patch_slots = patch_slots
+        self.start_interval = start_interval
+        self.upload_delay = upload_delay
+        self.poll_interval = poll_interval
+        self.patch_delay = patch_delay
+        self.post_processing_delay = post_processing_delay
+
+        self.zip_rate = timings.seconds_per_mb('zip') or DEFAULT_RATES['zip']
+        self.upload_rate = timings.seconds_per_mb('upload') or DEFAULT_RATES['upload']
+        self.processing_base = DEFAULT_PROCESSING_BASE
+        self.processing_rate = timings.seconds_per_mb('processing', base=self.processing_base) or DEFAULT_RATES['processing']
+        self.patch_latency = timings.mean('patch') or DEFAULT_PATCH_LATENCY
+
+    def schedule_starts(self, upload_seconds):
+        """
+        Replay the dispatcher of BatchScheduler and return the start time of every model.
+        """
+        slots = [0.0] * self.upload_slots  # Time each upload slot becomes free
+        starts = []
+        now = 0.0
+        for seconds in upload_seconds:
+            start = max(now, heapq.heappop(slots))
+            heapq.heappush(slots, start + seconds)
+            starts.append(start)
+            now = start + self.start_interval
+        return starts
+
+    def run(self, sizes, needs_patch, zipped=None):
+        """
+        Simulate a batch of models with the given packaged sizes in bytes. zipped tells for every
+        model whether its files are zipped first, by default all of them are.
+
+        Returns a dict with the predicted duration, the seconds every stage took summed over all
+        models, the stages of the model that finished last and the bottleneck, the stage that
+        model spent the most time in. dispatch is the spacing of the upload starts and
+        upload_queue the time a model waited for a free upload slot beyond that.
+        """
+        if not sizes:
+            return {'models': 0, 'total_bytes': 0, 'total_seconds': 0.0, 'stages': {}, 'bottleneck': None}
+
+        zipped = zipped if zipped is not None else [True] * len(sizes)
+        zip_seconds = [size / MB * self.zip_rate if zip_first else 0.0 for size, zip_first in zip(sizes, zipped)]
+        transfer_seconds = [size / MB * self.upload_rate for size in sizes]
+        upload_seconds = [z + self.upload_delay + t for z, t in zip(zip_seconds, transfer_seconds)]
+        starts = self.schedule_starts(upload_seconds)
+
+        patch_slots = [0.0] * self.patch_slots
+        timelines = []
+        jobs = []
+        for index, size in enumerate(sizes):
+            uploaded = starts[index] + upload_seconds[index]
+            processing = self.processing_base + size / MB * self.processing_rate
+            polls = -(-processing // self.poll_interval)  # Processing is only noticed on the next poll
+            noticed = uploaded + max(1, polls) * self.poll_interval
+            jobs.append((noticed + self.post_processing_delay, index, uploaded, noticed))
+
+        for ready, index, uploaded, noticed in sorted(jobs):
+            earliest_start = index * self.start_interval  # The dispatcher spaces the starts even with free slots
+            timeline = {
+                'dispatch': earliest_start,
+                'upload_queue': starts[index] - earliest_start,
+                'zip': zip_seconds[index],
+                'upload': self.upload_delay + transfer_seconds[index],
+                'processing': noticed - uploaded + self.post_processing_delay,
+                'patch_wait': 0.0,
+                'patch': 0.0,
+            }
+            finished = ready
+            if needs_patch:
+                slot_free = heapq.heappop(patch_slots)
+                patch_start = max(ready, slot_free)
+                finished = patch_start + self.patch_delay + self.patch_latency
+                heapq.heappush(patch_slots, finished)
+                timeline['patch_wait'] = patch_start - ready
+                timeline['patch'] = self.patch_delay + self.patch_latency
+            timelines.append((finished, timeline))
+
+        total_seconds, critical = max(timelines, key=lambda item: item[0])
+        stages = {stage: sum(timeline[stage] for finished, timeline in timelines) for stage in critical}
+        return {
+            'models': len(sizes),
+            'total_bytes': sum(sizes),
+            'total_seconds': total_seconds,
+            'stages': stages,
+            'critical_path': critical,
+            'bottleneck': max(critical, key=critical.get),
+        }
+
+
+def format_duration(seconds):
+    """
+    Format seconds as hours and minutes for status messages.
+    """
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}h {minutes % 60:02d}m"
@@ -1,19 +1,35 @@
 import os
 import threading
-import zipfile
 import json
-import random
-from tkinter import filedialog
+import sqlite3
+from collections import deque
+from itertools import islice
+from time import sleep
+from tkinter import filedialog, TclError
 from tkinterdnd2 import TkinterDnD, DND_FILES
 import customtkinter as ctk
 import requests
-from time import sleep
 from tkinter import ttk  # Import ttk module for the Notebook
-import queue
+from watcher import FolderWatcher
+from bulk_edit import BulkEditEngine, list_account_models, select_models
+from event_log import EventLog
+from retry import CircuitBreaker, RetryEngine
+from simulator import BatchSimulator, StageTimings, format_duration, upload_plan
+from scheduler import PRIORITIES, Batch
+from pipeline import clean_and_convert_price
+from jobqueue import JobQueue
+from engine import EngineClient, EngineError
+from inventory import ModelInventory
+from ui_metrics import UIMonitor, timed_ui
 
 # Constants
 SKETCHFAB_API_URL = 'https://api.sketchfab.com/v3'
 API_TOKEN = ''  # Replace with your actual API token
+STATUS_VIEW_LINES = 500  # Lines kept in the status box, the full history is in the event log file
+ENGINE_POLL_INTERVAL = 0.25  # Seconds between two requests for engine updates
+ROWS_PER_REFRESH = 500  # Status rows applied per turn of the main loop, the rest waits for the next turn
+UI_METRICS_INTERVAL = 60000  # Milliseconds between two UI responsiveness entries in the event log
+UI_STALL_WARNING_MS = 250  # Main loop latency (p99) above which the window feels stuck
 
 # Helper functions
 def get_request_payload(api_key, data=None, files=None, json_payload=False):
@@ -45,12 +61,8 @@ class UploadApp(TkinterDnD.Tk):
         screen_height = self.winfo_screenheight()
         width = int(screen_width * 0.9)
         height = int(screen_height * 0.9)
-        self.upload_semaphore = threading.Semaphore(6)
-        self.patch_semaphore = threading.Semaphore(6)
-        
         self.style = ttk.Style()
         self.style.theme_use("default")  # Using the default theme as a base
-        self.upload_queue = queue.Queue() 
         # Create a new style for the Treeview that includes borders
         self.style.configure("Custom.Treeview", 
                              background="white",
@@ -88,13 +100,36 @@ class UploadApp(TkinterDnD.Tk):
         self.api_key = ctk.StringVar()
         self.notebook = ttk.Notebook(self)  # Define notebook here
         self.notebook.pack(fill='both', expand=True)  # Pack it once
-        self.thread_status = {}
-        self.original_license = None
+        self.events = EventLog()
+        self.last_status_seq = 0
+        self.breaker = CircuitBreaker(on_state_change=self.on_breaker_change)
+        self.retry_engine = RetryEngine(self.breaker)
+        self.timings = StageTimings()
+        # Uploads run in a separate engine process, see engine.py
+        self.engine = None
+        self.engine_lock = threading.Lock()
+        # Filled by the engine connection and other background threads, drained by the main loop
+        self.engine_rows = {}  # (tab name, model name) -> latest row values not shown yet
+        self.engine_tabs = {}  # Status tab name -> model count of the engine's batches and other background work
+        self.engine_messages = deque(maxlen=STATUS_VIEW_LINES)
+        self.batch_priority = ctk.StringVar(value='Normal')
+        self.tree_rows = {}  # Status tab name -> {model name: Treeview item}
+        self.use_job_queue = ctk.IntVar(value=0)
+        self.job_queue_path = ctk.StringVar(value="sketchfab_jobs.db")
+        self.queued_batches = {}  # Batch id -> (batch, job queue) for batches handed to workers
+        self.job_queue_monitor = None
+        self.folder_watcher = None
+        self.watch_batches = {}  # Watched root folder -> batch the new models are added to
+        self.inventory_missing = []  # Local folders the last inventory check didn't find on the account
+        self.ui_monitor = UIMonitor(self)
 
         self.fetch_data()
         self.create_widgets()
         self.configure_grid()
-        self.state('zoomed')
+        try:
+            self.state('zoomed')
+        except TclError:
+            self.attributes('-zoomed', True)  # X11 window managers have no zoomed state
 
     def fetch_data(self):
         """
@@ -118,8 +153,14 @@ class UploadApp(TkinterDnD.Tk):
         tab1 = ctk.CTkFrame(self.notebook)
         tab2 = ctk.CTkFrame(self.notebook)
         self.notebook.add(tab1, text='Uploads')
+        bulk_tab = ctk.CTkFrame(self.notebook)
+        self.notebook.add(bulk_tab, text='Bulk Edit')
+        inventory_tab = ctk.CTkFrame(self.notebook)
+        self.notebook.add(inventory_tab, text='Inventory')
 
         self.setup_tab1(tab1)
+        self.setup_bulk_edit_tab(bulk_tab)
+        self.setup_inventory_tab(inventory_tab)
 
     def setup_tab1(self, parent):
         """
@@ -154,9 +195,20 @@ class UploadApp(TkinterDnD.Tk):
         browse_button = ctk.CTkButton(top_frame, text="Browse", command=self.delayed_browse_file)
         browse_button.grid(row=1, column=3, padx=10)
 
+        self.watch_button = ctk.CTkButton(top_frame, text="Watch Folder", command=self.add_watch_folder)
+        self.watch_button.grid(row=1, column=4, padx=10)
+
+        stop_watch_button = ctk.CTkButton(top_frame, text="Stop Watching", command=self.stop_watch_mode)
+        stop_watch_button.grid(row=1, column=5, padx=10)
+
         self.file_entry = ctk.CTkEntry(top_frame, width=400)
         self.file_entry.grid(row=2, column=0, columnspan=4, padx=10, pady=10, sticky="ew")
 
+        # Distributed mode, batches go to a shared job queue that worker.py processes on other hosts
+        ctk.CTkCheckBox(top_frame, text="Use job queue", variable=self.use_job_queue).grid(row=3, column=0, padx=10, pady=10)
+        job_queue_entry = ctk.CTkEntry(top_frame, textvariable=self.job_queue_path, width=400)
+        job_queue_entry.grid(row=3, column=1, columnspan=3, padx=10, pady=10, sticky="ew")
+
         # Drag and drop area
         drop_frame = ctk.CTkFrame(parent, height=100, fg_color="gray")
         drop_frame.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
@@ -223,9 +275,16 @@ class UploadApp(TkinterDnD.Tk):
         upload_button = ctk.CTkButton(action_frame, text="Upload", command=self.start_upload_manager)
         upload_button.pack(side="left", padx=10, pady=10)
 
+        ctk.CTkLabel(action_frame, text="Priority:").pack(side="left", padx=(10, 0), pady=10)
+        priority_combobox = ctk.CTkComboBox(action_frame, values=list(PRIORITIES), variable=self.batch_priority, width=100)
+        priority_combobox.pack(side="left", padx=10, pady=10)
+
         reset_button = ctk.CTkButton(action_frame, text="Reset form", command=self.reset_form)
         reset_button.pack(side="left", padx=10, pady=10)
 
+        dry_run_button = ctk.CTkButton(action_frame, text="Dry run", command=self.start_dry_run)
+        dry_run_button.pack(side="left", padx=10, pady=10)
+
         # Larger status field
         self.status_text = ctk.CTkTextbox(action_frame, height=100, width=100)  # Adjusted size
         self.status_text.pack(side="left", padx=10, pady=10, fill="both", expand=True)
@@ -262,6 +321,257 @@ class UploadApp(TkinterDnD.Tk):
         scroll.grid(row=0, column=1, sticky='ns')
         self.tree.configure(yscrollcommand=scroll.set)
 
+    def setup_bulk_edit_tab(self, parent):
+        """
+        Setup the tab for editing metadata of models that are already uploaded.
+        """
+        parent.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(parent, text="Model UIDs (new-line-separated):").grid(row=0, column=0, sticky="e")
+        self.bulk_uids_textbox = ctk.CTkTextbox(parent, height=120, width=500)
+        self.bulk_uids_textbox.grid(row=0, column=1, sticky="ew", columnspan=3, pady=5)
+
+        ctk.CTkLabel(parent, text="Or filter, name contains:").grid(row=1, column=0, sticky="e")
+        self.bulk_name_filter = ctk.CTkEntry(parent)
+        self.bulk_name_filter.grid(row=1, column=1, sticky="ew")
+        ctk.CTkLabel(parent, text="Tag:").grid(row=1, column=2, sticky="e")
+        self.bulk_tag_filter = ctk.CTkEntry(parent)
+        self.bulk_tag_filter.grid(row=1, column=3, sticky="ew")
+
+        # Empty fields are left unchanged on the models
+        ctk.CTkLabel(parent, text="New tags (new-line-separated):").grid(row=2, column=0, sticky="e")
+        self.bulk_tags_textbox = ctk.CTkTextbox(parent, height=90, width=500)
+        self.bulk_tags_textbox.grid(row=2, column=1, sticky="ew", columnspan=3, pady=5)
+
+        ctk.CTkLabel(parent, text="New description:").grid(row=3, column=0, sticky="e")
+        self.bulk_description_textbox = ctk.CTkTextbox(parent, height=90, width=500)
+        self.bulk_description_textbox.grid(row=3, column=1, sticky="ew", columnspan=3, pady=5)
+
+        ctk.CTkLabel(parent, text="Category 1").grid(row=4, column=0, sticky="e")
+        self.bulk_category1_combobox = ctk.CTkComboBox(parent, values=self.categories)
+        self.bulk_category1_combobox.grid(row=4, column=1, sticky="ew")
+        self.bulk_category1_combobox.set("")
+        ctk.CTkLabel(parent, text="Category 2").grid(row=4, column=2, sticky="e")
+        self.bulk_category2_combobox = ctk.CTkComboBox(parent, values=self.categories)
+        self.bulk_category2_combobox.grid(row=4, column=3, sticky="ew")
+        self.bulk_category2_combobox.set("")
+
+        ctk.CTkLabel(parent, text="License:").grid(row=5, column=0, sticky="e")
+        self.bulk_license_combobox = ctk.CTkComboBox(parent, values=[""] + self.licenses)
+        self.bulk_license_combobox.grid(row=5, column=1, sticky="ew")
+        self.bulk_license_combobox.set("")
+        ctk.CTkLabel(parent, text="Price:").grid(row=5, column=2, sticky="e")
+        self.bulk_price_entry = ctk.CTkEntry(parent)
+        self.bulk_price_entry.grid(row=5, column=3, sticky="ew")
+
+        ctk.CTkLabel(parent, text="Privacy:").grid(row=6, column=0, sticky="e")
+        self.bulk_privacy_combobox = ctk.CTkComboBox(parent, values=["Unchanged", "Public", "Private"])
+        self.bulk_privacy_combobox.grid(row=6, column=1, sticky="ew")
+        self.bulk_privacy_combobox.set("Unchanged")
+        ctk.CTkLabel(parent, text="Password (if private):").grid(row=6, column=2, sticky="e")
+        self.bulk_password_entry = ctk.CTkEntry(parent)
+        self.bulk_password_entry.grid(row=6, column=3, sticky="ew")
+
+        ctk.CTkLabel(parent, text="Checkpoint file:").grid(row=7, column=0, sticky="e")
+        self.bulk_checkpoint_entry = ctk.CTkEntry(parent)
+        self.bulk_checkpoint_entry.grid(row=7, column=1, sticky="ew", columnspan=3)
+        self.bulk_checkpoint_entry.insert(0, "bulk_edit_checkpoint.jsonl")
+
+        bulk_button = ctk.CTkButton(parent, text="Apply to models", command=self.start_bulk_edit)
+        bulk_button.grid(row=8, column=1, pady=10)
+
+    def collect_bulk_changes(self):
+        """
+        Read the bulk edit form into a dict of field changes, None for fields left unchanged.
+        """
+        tags_input = self.bulk_tags_textbox.get("1.0", ctk.END).strip()
+        description = self.bulk_description_textbox.get("1.0", ctk.END).strip()
+        categories = [self.category_map1.get(name) for name in (self.bulk_category1_combobox.get(), self.bulk_category2_combobox.get())]
+        categories = [slug for slug in categories if slug]
+        license_slug = self.license_map.get(self.bulk_license_combobox.get())
+        privacy = self.bulk_privacy_combobox.get()
+
+        changes = {
+            'tags': tags_input.split('\n') if tags_input else None,
+            'description': description or None,
+            'categories': categories or None,
+            'license': license_slug,
+            'private': {'Public': False, 'Private': True}.get(privacy),
+            'password': self.bulk_password_entry.get() or None,
+        }
+        price_input = self.bulk_price_entry.get().strip()
+        if price_input:
+            # Also sent on its own, to re-price models that already have a Standard or Editorial license
+            changes['price'] = clean_and_convert_price(price_input)
+            if changes['price'] is None:
+                raise ValueError("The price must be at least 3.99.")
+        elif license_slug in ['st', 'ed']:
+            raise ValueError("Standard and Editorial licenses need a price of at least 3.99.")
+        return changes
+
+    def start_bulk_edit(self):
+        """
+        Start the bulk edit in a separate thread.
+        """
+        if not self.api_key.get():
+            self.update_status("Please enter your Sketchfab API key.")
+            return
+        try:
+            changes = self.collect_bulk_changes()
+        except ValueError as e:
+            self.update_status(str(e))
+            return
+        uids_input = self.bulk_uids_textbox.get("1.0", ctk.END).strip()
+        uids = [uid.strip() for uid in uids_input.split('\n') if uid.strip()]
+        name_filter = self.bulk_name_filter.get().strip()
+        tag_filter = self.bulk_tag_filter.get().strip()
+        checkpoint_path = self.bulk_checkpoint_entry.get().strip() or "bulk_edit_checkpoint.jsonl"
+        threading.Thread(target=self.bulk_edit, args=(uids, name_filter, tag_filter, changes, checkpoint_path), daemon=True).start()
+
+    def bulk_edit(self, uids, name_filter, tag_filter, changes, checkpoint_path):
+        """
+        Resolve the selected models and patch them with the bulk edit engine.
+        """
+        if not uids and (name_filter or tag_filter):
+            self.update_status("Fetching models from the account...")
+            try:
+                models = list_account_models(self.api_key.get())
+            except requests.RequestException as e:
+                self.update_status(f"Could not fetch models: {e}", 'error')
+                return
+            uids = select_models(models, name_filter or None, tag_filter or None)
+        if not uids:
+            self.update_status("No models selected for bulk edit.")
+            return
+
+        with self.engine_lock:
+            tab_name = f"Bulk Edit {len(set(self.status_trees) | set(self.engine_tabs)) + 1}"
+        self.queue_status_tab(tab_name, len(uids))
+        for uid in uids:
+            self.update_tree_view(uid, 'Queued', 'Waiting', tab_name, 'Patch Not Started', 'In Progress')
+
+        def on_result(uid, status, detail):
+            if status == 'error':
+                self.update_tree_view(uid, 'Complete', detail, tab_name, 'Patch Failed', 'Aborted')
+            else:
+                self.update_tree_view(uid, 'Complete', detail, tab_name, 'Patch Successful', 'Fully Completed')
+
+        self.update_status(f"Patching {len(uids)} models...")
+        engine = BulkEditEngine(self.api_key.get(), changes, checkpoint_path, retry_engine=self.retry_engine, on_result=on_result)
+        results = engine.run(uids)
+        failed = sum(1 for status, detail in results.values() if status == 'error')
+        self.update_status(f"Bulk edit finished: {len(results) - failed} patched or skipped, {failed} failed.")
+
+    def setup_inventory_tab(self, parent):
+        """
+        Setup the tab for comparing local model folders with the models on the account.
+        """
+        parent.grid_columnconfigure(1, weight=1)
+        parent.grid_rowconfigure(3, weight=1)
+
+        ctk.CTkLabel(parent, text="Local models folder:").grid(row=0, column=0, sticky="e")
+        self.inventory_folder_entry = ctk.CTkEntry(parent)
+        self.inventory_folder_entry.grid(row=0, column=1, sticky="ew", pady=5)
+        browse_button = ctk.CTkButton(parent, text="Browse", command=self.browse_inventory_folder)
+        browse_button.grid(row=0, column=2, padx=10)
+
+        self.inventory_full_refresh = ctk.IntVar(value=0)
+        ctk.CTkCheckBox(parent, text="Full refresh (finds models deleted on the website)",
+                        variable=self.inventory_full_refresh).grid(row=1, column=1, sticky="w")
+        self.inventory_use_metadata = ctk.IntVar(value=0)
+        ctk.CTkCheckBox(parent, text="Match license and tags of the upload form",
+                        variable=self.inventory_use_metadata).grid(row=2, column=1, sticky="w")
+
+        button_frame = ctk.CTkFrame(parent)
+        button_frame.grid(row=1, column=2, rowspan=2, padx=10)
+        ctk.CTkButton(button_frame, text="Check inventory", command=self.start_inventory_check).pack(pady=5)
+        ctk.CTkButton(button_frame, text="Upload missing", command=self.upload_missing_models).pack(pady=5)
+
+        tree_frame = ttk.Frame(parent)
+        tree_frame.grid(row=3, column=0, columnspan=3, sticky="nsew", padx=5, pady=5)
+        self.inventory_tree = ttk.Treeview(tree_frame, columns=('Issue', 'Model Name', 'UIDs', 'Detail', 'Folder'),
+                                           show='headings', style="Custom.Treeview")
+        for column, width in (('Issue', 150), ('Model Name', 250), ('UIDs', 250), ('Detail', 200), ('Folder', 400)):
+            self.inventory_tree.heading(column, text=column, anchor='center')
+            self.inventory_tree.column(column, width=width, anchor='center')
+        scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.inventory_tree.yview)
+        scroll.pack(side='right', fill='y')
+        self.inventory_tree.pack(fill='both', expand=True)
+        self.inventory_tree.configure(yscrollcommand=scroll.set)
+        self.inventory_tree.tag_configure('error', background='#ffcccc')
+        self.inventory_tree.tag_configure('patch_failed', background='#FFA500')
+        self.inventory_tree.tag_configure('normal', background='#ffffff')
+
+    def browse_inventory_folder(self):
+        """
+        Ask for the folder holding the local model folders.
+        """
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            self.inventory_folder_entry.delete(0, ctk.END)
+            self.inventory_folder_entry.insert(0, folder_path)
+
+    def start_inventory_check(self):
+        """
+        Start the inventory check in a separate thread.
+        """
+        if not self.api_key.get():
+            self.update_status("Please enter your Sketchfab API key.")
+            return
+        metadata = None
+        if self.inventory_use_metadata.get():
+            tags_input = self.tags_textbox.get("1.0", ctk.END).strip()
+            metadata = {'license': self.license_map.get(self.license_combobox.get()),
+                        'tags': tags_input.split('\n') if tags_input else []}
+        root = self.inventory_folder_entry.get().strip()
+        threading.Thread(target=self.inventory_check, args=(root, bool(self.inventory_full_refresh.get()), metadata), daemon=True).start()
+
+    def inventory_check(self, root, full, metadata):
+        """
+        Update the cached model list of the account and compare it with the local model folders.
+        """
+        self.update_status("Fetching models from the account...")
+        inventory = ModelInventory(self.api_key.get(), retry_engine=self.retry_engine,
+                                   on_progress=lambda count: self.update_status(f"Fetched {count} models", 'debug'))
+        try:
+            counts = inventory.sync(full)
+        except (requests.RequestException, ValueError, sqlite3.Error) as e:
+            self.update_status(f"Could not fetch models: {e}", 'error')
+            return
+        self.update_status(f"Model list updated: {counts['added']} new, {counts['updated']} changed, "
+                           f"{counts['removed']} removed, {counts['refreshed']} processing checked.", **counts)
+
+        folder_paths = self.find_subfolders_with_models(root) if root and os.path.isdir(root) else []
+        report = inventory.reconcile(folder_paths, metadata)
+        self.update_status(f"Inventory: {report['matched']} of {report['folders']} local models found on the account, "
+                           f"{len(report['issues'])} issues.")
+        self.after(0, self.show_inventory_issues, report['issues'])
+
+    @timed_ui('inventory_view')
+    def show_inventory_issues(self, issues):
+        """
+        Fill the inventory tab with the issues of the last check.
+        """
+        self.inventory_tree.delete(*self.inventory_tree.get_children())
+        for issue in issues:
+            tag = 'error' if issue['issue'] in ('Missing', 'Stuck', 'Processing failed') else 'patch_failed'
+            self.inventory_tree.insert('', 'end', tags=(tag,), values=(
+                issue['issue'], issue['name'], ", ".join(issue['uids']), issue['detail'], issue['folder'] or ''))
+        self.inventory_missing = [issue['folder'] for issue in issues if issue['issue'] == 'Missing']
+
+    def upload_missing_models(self):
+        """
+        Select the folders the last inventory check didn't find on the account for upload.
+        """
+        if not self.inventory_missing:
+            self.update_status("No missing models to upload, run an inventory check first.")
+            return
+        self.folder_paths = list(self.inventory_missing)
+        self.current_main_folder_name = f"Missing - {os.path.basename(self.inventory_folder_entry.get().strip())}"
+        self.display_browse_paths()
+        self.notebook.select(0)
+        self.update_status(f"Selected {len(self.folder_paths)} missing models, check the form and click Upload.")
+
     def update_category1(self, selected_category):
         """
         Update the category1 variable based on the selected category.
@@ -289,25 +599,30 @@ class UploadApp(TkinterDnD.Tk):
     
     def update_tree_view(self, model_name, status, progress, tab_name, patch_status, batch_status):
         """
-        Update the Treeview with new status information.
+        Update the Treeview with new status information, safe to call from any thread.
+        The row is shown by refresh_engine_rows on the main loop, like the rows of the engine.
+        """
+        level = 'error' if 'Failed' in status or 'Failed' in patch_status else 'debug'
+        self.events.log(f"{model_name}: {status}, {progress}, {patch_status}", level, model=model_name, batch=tab_name,
+                        status=status, progress=progress, patch_status=patch_status, summary=batch_status)
+        with self.engine_lock:
+            self.engine_rows[(tab_name, model_name)] = (model_name, status, progress, patch_status, batch_status)
+
+    def queue_status_tab(self, tab_name, model_count=None):
+        """
+        Have the main loop create a status tab, for background threads.
+        """
+        with self.engine_lock:
+            self.engine_tabs[tab_name] = model_count
+
+    def show_tree_row(self, tab_name, values):
+        """
+        Add or update the row of a model in a status tab.
         """
         tree = self.status_trees.get(tab_name)
         if tree:
-            for item in tree.get_children():
-                if tree.item(item, 'values')[0] == model_name:
-                    # Determine the appropriate tag based on status or patch status
-                    if status == 'Upload Failed':
-                        tag = 'error'
-                    elif patch_status == 'Patch Failed':
-                        tag = 'patch_failed'
-                    else:
-                        tag = 'normal'
-
-                    # Update the item with the determined tag
-                    tree.item(item, values=(model_name, status, progress, patch_status, batch_status), tags=(tag,))
-                    return
-
-            # Insert new item with the appropriate tag
+            model_name, status, progress, patch_status, batch_status = values
+            # Determine the appropriate tag based on status or patch status
             if status == 'Upload Failed':
                 tag = 'error'
             elif patch_status == 'Patch Failed':
@@ -315,12 +630,12 @@ class UploadApp(TkinterDnD.Tk):
             else:
                 tag = 'normal'
 
-            tree.insert('', 'end', values=(model_name, status, progress, patch_status, batch_status), tags=(tag,))
-
-        # Configure tags and their associated background colors
-        tree.tag_configure('error', background='#ffcccc')  # light red for upload failures
-        tree.tag_configure('patch_failed', background='#FFA500')  # orange for patch failures
-        tree.tag_configure('normal', background='#ffffff')
+            rows = self.tree_rows.setdefault(tab_name, {})
+            item = rows.get(model_name)
+            if item:
+                tree.item(item, values=values, tags=(tag,))
+            else:
+                rows[model_name] = tree.insert('', 'end', values=values, tags=(tag,))
     
     def determine_tag(self, status, patch_status):
         """
@@ -335,14 +650,32 @@ class UploadApp(TkinterDnD.Tk):
         else:
             return 'normal'
     
-    def update_status(self, message):
+    def update_status(self, message, level='info', **fields):
         """
-        Update the GUI status text in a thread-safe manner.
+        Record a status message in the event log, safe to call from any thread.
+        The status box picks it up on the next refresh of the main loop.
         """
-        """ Update the GUI status text in a thread-safe manner. """
-        if self.status_text:  # Ensure the textbox is available
-            self.status_text.delete(1.0, ctk.END)
-            self.status_text.insert(ctk.END, message)
+        self.events.log(message, level, **fields)
+
+    def refresh_status_view(self):
+        """
+        Append new events to the status box, keeping only the last STATUS_VIEW_LINES lines.
+        """
+        new_events = self.events.events_since(self.last_status_seq, min_level='info')
+        lines = [f"[{event['level'].upper()}] {event['message']}" for event in new_events[-STATUS_VIEW_LINES:]]
+        with self.engine_lock:
+            lines.extend(self.engine_messages)
+            self.engine_messages.clear()
+        if new_events:
+            self.last_status_seq = new_events[-1]['seq']
+        if not lines or not self.status_text:
+            return
+        with self.ui_monitor.timed('status_view'):
+            self.status_text.insert(ctk.END, "\n".join(lines) + "\n")
+            line_count = int(self.status_text.index('end-1c').split('.')[0])
+            if line_count > STATUS_VIEW_LINES:
+                self.status_text.delete("1.0", f"{line_count - STATUS_VIEW_LINES}.0")
+            self.status_text.see(ctk.END)
     
     def toggle_price_field(self, selected_license):
         """
@@ -367,16 +700,114 @@ class UploadApp(TkinterDnD.Tk):
         """
         Check and update the status periodically.
         """
-        # Check if updates are needed
-        # Update GUI accordingly
+        self.refresh_status_view()
         self.after(1000, self.check_and_update_status)  # Check every second
 
+    def refresh_engine_rows(self):
+        """
+        Show the status rows the engine reported since the last refresh.
+        Only ROWS_PER_REFRESH rows are applied at a time so a flood of updates can't freeze the window.
+        """
+        with self.engine_lock:
+            keys = list(islice(self.engine_rows, ROWS_PER_REFRESH))
+            rows = [(tab_name, self.engine_rows.pop((tab_name, model_name))) for tab_name, model_name in keys]
+            new_tabs = [(tab_name, count) for tab_name, count in self.engine_tabs.items() if tab_name not in self.status_trees]
+            backlog = len(self.engine_rows)
+        if rows or new_tabs:
+            with self.ui_monitor.timed('engine_rows'):
+                for tab_name, count in new_tabs:
+                    self.create_status_tab(tab_name, count)  # Batch started before the GUI attached
+                for tab_name, values in rows:
+                    self.show_tree_row(tab_name, values)
+        self.after(10 if backlog else 100, self.refresh_engine_rows)
+
+    def sync_with_engine(self):
+        """
+        Attach to the upload engine, starting it when it isn't running, and collect its updates.
+        Runs in a background thread, the main loop shows what it collected.
+        """
+        version = seq = 0
+        attached = False
+        while True:
+            if self.engine is None:
+                try:
+                    self.engine = EngineClient.connect_or_start()
+                except OSError as e:
+                    self.update_status(f"Could not start the upload engine: {e}", 'error')
+                    sleep(10)
+                    continue
+                version = seq = 0  # A new engine starts counting from zero, fetch everything
+                attached = True
+            try:
+                update = self.engine.call('updates', since_version=version, since_seq=seq)
+            except (OSError, EOFError, EngineError) as e:
+                self.update_status(f"Lost the connection to the upload engine: {e}", 'warning')
+                self.engine = None
+                continue
+            if attached:
+                attached = False
+                self.resubmit_watch_batches({tab_name for tab_name, total in update['batches']})
+            version, seq = update['version'], update['seq']
+            with self.engine_lock:
+                for tab_name, values in update['rows']:
+                    self.engine_rows[(tab_name, values[0])] = values
+                self.engine_tabs.update(update['batches'])
+                self.engine_messages.extend(f"[{level.upper()}] {message}" for level, message in update['events'])
+            sleep(ENGINE_POLL_INTERVAL)
+
+    def resubmit_watch_batches(self, engine_tabs):
+        """
+        Start the batches of watched folders again in an engine that doesn't know them,
+        e.g. one started after the previous engine exited. Folders it had queued are lost with it.
+        """
+        for root, batch in list(self.watch_batches.items()):
+            if batch.tab_name in engine_tabs:
+                continue
+            if self.submit_to_engine(batch):
+                self.update_status(f"Watching {root} again in the restarted upload engine.", 'warning', batch=batch.id)
+
+    def call_engine(self, command, **kwargs):
+        """
+        Send a command to the upload engine. Returns None and reports the problem when that fails.
+        """
+        engine = self.engine
+        if engine is None:
+            self.update_status("The upload engine is not running yet, please try again in a moment.", 'error')
+            return None
+        try:
+            return engine.call(command, **kwargs)
+        except (OSError, EOFError, EngineError) as e:
+            self.update_status(f"Upload engine error: {e}", 'error')
+            return None
+
+    def log_ui_metrics(self):
+        """
+        Write main loop latency and UI update times to the event log and start a new measuring period.
+        """
+        report = self.ui_monitor.report()
+        self.ui_monitor.reset()
+        latency = report.get('main_loop_latency')
+        if latency and latency['p99'] > UI_STALL_WARNING_MS:
+            self.update_status(f"The window was unresponsive for up to {latency['max']:.0f} ms in the last minute.", 'warning', ui=report)
+        else:
+            self.events.log("UI responsiveness", 'debug', ui=report)
+        self.after(UI_METRICS_INTERVAL, self.log_ui_metrics)
+
     def start(self):
         """
         Start the main application loop.
         """
+        threading.Thread(target=self.sync_with_engine, daemon=True).start()
+        self.ui_monitor.start()
+        self.after(UI_METRICS_INTERVAL, self.log_ui_metrics)
         self.check_and_update_status()
+        self.refresh_engine_rows()
         self.mainloop()
+        # Uploads keep going in the engine, only the folder watching ends with the window
+        self.stop_watch_mode()
+        if self.engine:
+            self.engine.close()
+        self.events.close()
         
     def configure_grid(self):
         """
@@ -468,6 +899,7 @@ class UploadApp(TkinterDnD.Tk):
                     break  # Only add each subfolder once
         return list(set(subfolders))  # Remove duplicates if any
 
+    @timed_ui('drop_scan')
     def on_drop(self, event):
         """
         Handle multiple folders dropped onto the application.
@@ -494,67 +926,188 @@ class UploadApp(TkinterDnD.Tk):
         # Use the collected main folder names for other parts of the GUI, such as status tabs
         self.current_main_folder_name = display_names
     
-    def start_upload_manager(self):
+    def add_watch_folder(self):
         """
-        Start the upload manager in a separate thread.
+        Ask for a root folder and keep uploading model folders that appear in it.
         """
-        threading.Thread(target=self.upload, daemon=True).start()
-        self.update_status(f"Preparing to upload {len(self.folder_paths)} models...")
+        if not self.api_key.get():
+            self.update_status("Please enter your Sketchfab API key.")
+            return
+        try:
+            metadata = self.collect_upload_metadata()
+        except ValueError as e:
+            self.update_status(str(e), 'error')
+            return
+        folder_path = filedialog.askdirectory()
+        if not folder_path:
+            return
 
-    def upload(self):
+        root = os.path.normpath(folder_path)
+        if root not in self.watch_batches:
+            batch = Batch(f"Watch - {os.path.basename(root)}", [], metadata,
+                          PRIORITIES.get(self.batch_priority.get(), 1), continuous=True, api_key=self.api_key.get())
+            if not self.submit_to_engine(batch):
+                return
+            self.create_status_tab(batch.tab_name)
+            self.watch_batches[root] = batch
+
+        if self.folder_watcher is None:
+            self.folder_watcher = FolderWatcher(on_ready=self.enqueue_watched_folder)
+        self.folder_watcher.add_root(root)
+        self.folder_watcher.start()
+        self.update_status(f"Watching {len(self.folder_watcher.roots)} folder(s) for new models...")
+
+    def stop_watch_mode(self):
+        """
+        Stop watching folders. Models already queued keep uploading.
+        """
+        if self.folder_watcher:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
+            for batch in self.watch_batches.values():
+                self.call_engine('close_batch', batch_id=batch.id)
+            self.watch_batches = {}
+            self.update_status("Stopped watching folders.")
+
+    def enqueue_watched_folder(self, folder_path):
+        """
+        Queue a settled model folder found by the folder watcher for upload.
+        """
+        batch = next((batch for root, batch in self.watch_batches.items()
+                      if folder_path == root or folder_path.startswith(root + os.sep)), None)
+        if batch is None:
+            return  # Watching stopped in the meantime
+        self.call_engine('add_folder', batch_id=batch.id, folder_path=folder_path)
+
+    def collect_upload_metadata(self):
+        """
+        Read the upload form into the metadata shared by every model of a batch.
+        Raises ValueError when the form is not complete.
+        """
+        category1_slug = self.category_map1.get(self.category1_combobox.get())
+        category2_slug = self.category_map2.get(self.category2_combobox.get())
+        license_slug = self.license_map.get(self.license_combobox.get())
+        if not category1_slug or not license_slug:
+            raise ValueError("Please select a category and a license.")
+
+        # Handle pricing information for certain licenses
+        price_float = None
+        if license_slug in ['st', 'ed']:
+            try:
+                price_float = float(self.price.get().replace(',', '.'))
+            except ValueError:
+                raise ValueError("Invalid price format, please enter a valid number.")
+
+        tags_input = self.tags_textbox.get("1.0", ctk.END).strip()
+        return {
+            'description': self.description_textbox.get("1.0", ctk.END).strip(),
+            'tags': tags_input.split('\n') if tags_input else [],
+            'categories': [category1_slug] + ([category2_slug] if category2_slug else []),
+            'license': license_slug,
+            'private': bool(self.private.get()),
+            'password': self.password.get() if self.private.get() else None,
+            'isPublished': bool(self.isPublished.get()),
+            'isInspectable': bool(self.isInspectable.get()),
+            'price': price_float if price_float else None
+        }
+
+    def start_upload_manager(self):
         """
-        Manage the upload process by creating threads for each folder.
+        Turn the selected folders into a batch and hand it to the upload engine.
         """
-        threads = []
-        thread_id = 0
-        base_delay = 2  # Base delay in seconds
-        max_delay = 60  # Maximum delay in seconds
-        current_delay = base_delay
-        total_models = len(self.folder_paths)  # Total number of models to upload
-        half_point = total_models // 2  # Determine the half point
-
         if not self.api_key.get():
             self.update_status("Please enter your Sketchfab API key.")
             return
+        if not self.folder_paths:
+            self.update_status("No folders selected for upload.")
+            return
+        try:
+            metadata = self.collect_upload_metadata()
+        except ValueError as e:
+            self.update_status(str(e), 'error')
+            return
 
-        if self.folder_paths:
-            self.create_status_tab(self.current_main_folder_name, len(self.folder_paths))
-
-            while self.folder_paths:
-                if len(self.folder_paths) == half_point:  # Check if we've reached the half point
-                    self.update_status("Pausing for 2 minutes at half point...")
-                    sleep(120)  # 2-minute pause
-                while len(threads) < 6 and self.folder_paths:
-                    folder_path = self.folder_paths.pop(0)
-                    thread = threading.Thread(target=self.upload_folder, args=(folder_path, self.current_main_folder_name, thread_id))
-                    threads.append(thread)
-                    self.thread_status[thread_id] = 'starting'
-                    thread.start()
-                    thread_id += 1
-                    sleep(2)
-                
-                threads = [t for t in threads if t.is_alive()]
-                if any(self.thread_status[tid] == 429 for tid in self.thread_status):
-                    current_delay = min(max_delay, current_delay * 2)  # Exponential backoff
-                    sleep(5)
-                else:
-                    current_delay = max(base_delay, current_delay / 2)  # Decrease delay if no recent 429s
-                    sleep(5)
-
-                if not self.folder_paths and threads:  # Check before last model starts
-                    self.update_status("Pausing for 2 minutes before the last model upload...")
-                    sleep(180)  # 2-minute pause
-
-            for t in threads:
-                t.join()
-
-            self.update_status("All uploads completed.")
+        name = getattr(self, 'current_main_folder_name', None) or "Upload"
+        batch = Batch(name, self.folder_paths, metadata, PRIORITIES.get(self.batch_priority.get(), 1), api_key=self.api_key.get())
+        if self.use_job_queue.get():
+            try:
+                job_queue = JobQueue(self.job_queue_path.get())
+                job_queue.enqueue_batch(batch)
+            except sqlite3.Error as e:
+                self.update_status(f"Could not queue batch {batch.tab_name}: {e}", 'error')
+                return
+            self.create_status_tab(batch.tab_name, batch.total)
+            self.queued_batches[batch.id] = (batch, job_queue)
+            if self.job_queue_monitor is None:
+                self.job_queue_monitor = threading.Thread(target=self.monitor_job_queue, daemon=True)
+                self.job_queue_monitor.start()
+            self.update_status(f"Queued {batch.total} models in batch {batch.tab_name} for the workers of {job_queue.path}.", batch=batch.id)
         else:
+            if not self.submit_to_engine(batch):
+                return
+            self.create_status_tab(batch.tab_name, batch.total)
+        # The batch has its own copy of the folders and metadata, the form is free for the next one
+        self.reset_browse_field()
+
+    def monitor_job_queue(self, interval=5):
+        """
+        Show the progress workers write to the job queue in the status tabs of the queued batches.
+        """
+        last_version = {}
+        while True:
+            sleep(interval)
+            for batch_id, (batch, job_queue) in list(self.queued_batches.items()):
+                try:
+                    jobs = job_queue.changes_since(batch_id, last_version.get(batch_id, 0))
+                    counts = job_queue.counts(batch_id)
+                except sqlite3.Error as e:
+                    self.update_status(f"Could not read the job queue: {e}", 'warning')
+                    continue
+                for job in jobs:
+                    last_version[batch_id] = max(last_version.get(batch_id, 0), job['version'])
+                    model_name = job['model_name'] or os.path.basename(job['folder_path'])
+                    self.update_tree_view(model_name, job['status'] or job['state'].capitalize(), job['progress'] or 'Waiting',
+                                          batch.tab_name, job['patch_status'] or 'Patch Not Started', job['summary'] or 'In Progress')
+                if not counts.get('queued') and not counts.get('leased'):
+                    del self.queued_batches[batch_id]
+                    self.update_status(f"Workers finished batch {batch.tab_name}: {counts.get('done', 0)} done, {counts.get('failed', 0)} failed.", batch=batch_id)
+
+    def submit_to_engine(self, batch):
+        """
+        Start a batch in the upload engine. Returns False when the engine didn't take it.
+        """
+        tab_name = self.call_engine('submit', name=batch.name, folder_paths=list(batch.pending), metadata=batch.metadata,
+                                    priority=batch.priority, continuous=batch.continuous, api_key=batch.api_key, batch_id=batch.id)
+        if tab_name is None:
+            return False
+        with self.engine_lock:
+            self.engine_tabs[tab_name] = None if batch.continuous else batch.total
+        return True
+
+    def start_dry_run(self):
+        """
+        Start the dry run estimate in a separate thread.
+        """
+        threading.Thread(target=self.dry_run, args=(list(self.folder_paths),), daemon=True).start()
+        self.update_status(f"Estimating upload time for {len(self.folder_paths)} models...")
+
+    def dry_run(self, folder_paths):
+        """
+        Predict how long uploading the selected folders takes, without touching the network.
+        """
+        if not folder_paths:
             self.update_status("No folders selected for upload.")
+            return
+        plans = [upload_plan(folder_path) for folder_path in folder_paths]
+        sizes = [size for size, zipped in plans]
+        self.timings.load()  # The engine process records the timings of new uploads
+        needs_patch = self.license_map.get(self.license_combobox.get()) in ['st', 'ed']
+        result = BatchSimulator(self.timings).run(sizes, needs_patch, [zipped for size, zipped in plans])
+        self.update_status(
+            f"Dry run: {result['models']} models, {result['total_bytes'] / (1024 * 1024):.0f} MB, "
+            f"estimated {format_duration(result['total_seconds'])}. Bottleneck: {result['bottleneck']}.",
+            stages=result['stages'], critical_path=result['critical_path'])
 
-        self.reset_browse_field()
-        self.reset_form()
-    
     def reset_browse_field(self):
         """
         Reset the browse field to be empty after uploading.
@@ -563,12 +1116,12 @@ class UploadApp(TkinterDnD.Tk):
         self.folder_paths = []  # Clear the list of folder paths
     
     # Ensure when creating the Treeview, you specify the new style
-    def create_status_tab(self, tab_name, model_count):
+    def create_status_tab(self, tab_name, model_count=None):
         """
         Create a tab with the given name for tracking upload status and show model count.
         """
-        # Modify the tab title to show the count of models
-        tab_label = f"{tab_name} - {model_count} Models"
+        # Modify the tab title to show the count of models, watched folders have no fixed count
+        tab_label = f"{tab_name} - {model_count} Models" if model_count is not None else tab_name
         new_tab = ctk.CTkFrame(self.notebook)
         self.notebook.add(new_tab, text=tab_label)
 
@@ -600,6 +1153,11 @@ class UploadApp(TkinterDnD.Tk):
         scroll = ttk.Scrollbar(frame_for_treeview, orient="vertical", command=tree.yview)
         scroll.pack(side='right', fill='y')
         tree.configure(yscrollcommand=scroll.set)
+
+        # Configure tags and their associated background colors
+        tree.tag_configure('error', background='#ffcccc')  # light red for upload failures
+        tree.tag_configure('patch_failed', background='#FFA500')  # orange for patch failures
+        tree.tag_configure('normal', background='#ffffff')
         self.status_trees[tab_name] = tree
     
     def on_selection_changed(self, event):
@@ -641,239 +1199,15 @@ class UploadApp(TkinterDnD.Tk):
         self.file_entry.delete(0, ctk.END)
         self.folder_paths.clear()
         
-    def upload_model(self, file_path, data):
+    def on_breaker_change(self, opened, reason):
         """
-        Upload model to Sketchfab with an initial 'free-standard' license if required.
+        Report when the circuit breaker pauses or resumes the upload pipeline.
         """
-        self.original_license = data.get('license')  # Save the original license
-        if len(data['name']) > 48:
-            data['name'] = data['name'][:48]  # Truncate to the maximum allowed length
-
-        # Temporarily set license to 'free-st' for initial upload if it's 'st' or 'ed'
-        if self.original_license in ['st', 'ed']:
-            data['license'] = 'free-st'
-
-        sleep(5)
-        model_endpoint = f'{SKETCHFAB_API_URL}/models'
-        headers = {'Authorization': f'Token {self.api_key.get()}'}
-        try:
-            with open(file_path, 'rb') as file:
-                files = {'modelFile': (os.path.basename(file_path), file)}
-                response = requests.post(model_endpoint, headers=headers, files=files, data=data)
-                if response.status_code == requests.codes.created:
-                    model_url = response.headers.get('Location')
-                    model_uid = model_url.split('/')[-1]
-                    # Restore the original license for return
-                    data['license'] = self.original_license
-                    return model_uid, model_url, 'success', self.original_license, None
-                else:
-                    return None, None, 'error', self.original_license, response.json().get('detail', 'Unknown error occurred')
-        except Exception as e:
-            return None, None, 'error', self.original_license, str(e)
-    
-    def clean_and_convert_price(self, input_price):
-        """
-        Converts a price input to the required whole number format by multiplying by 100.
-        """
-        if input_price is None:
-            return None
-        # Handle string input with commas as decimal separators
-        if isinstance(input_price, str):
-            input_price = input_price.replace(',', '.')  # Replace comma with dot for decimal
-            try:
-                price_float = float(input_price)
-            except ValueError:
-                return None
-        elif isinstance(input_price, (int, float)):
-            price_float = float(input_price)  # Ensure it's a float if not already
+        if opened:
+            self.update_status(f"Pausing all requests: {reason}", 'warning')
         else:
-            return None
-
-        # Convert to integer by multiplying by 100
-        price_int = int(round(price_float * 100))
-        if price_int < 399:  # Ensure the price meets the minimum required value
-            return None
-        return price_int
-    
-    def patch_model(self, uid, original_license, price):
-        """
-        Patch the model's license and price after initial upload.
-        """
-        with self.patch_semaphore:
-            """Patch the model's license and price after initial upload."""
-            # Added static delay to manage the rate of patch operations
-            sleep(30)
-
-            headers = {'Authorization': f'Token {self.api_key.get()}', 'Content-Type': 'application/json'}
-            patch_data = {'license': self.original_license}
-
-            if self.original_license in ['st', 'ed']:  # If the license type requires a price
-                try:
-                    price = self.clean_and_convert_price(price)
-                    if price is None:
-                        self.update_status(f"Invalid price for model {uid}. Patch aborted.")
-                        return 'error'
-                    patch_data['price'] = price
-                except ValueError as e:
-                    self.update_status(f"Price value error for model {uid}: {e}. Patch aborted.")
-                    return 'error'
-
-            patch_endpoint = f'{SKETCHFAB_API_URL}/models/{uid}'
-            backoff_time = 20  # Start with a 10 second backoff time
-            max_retries = 200  # Set a maximum number of retries to avoid infinite loops
-            attempts = 0
-
-            while attempts < max_retries:
-                try:
-                    response = requests.patch(patch_endpoint, headers=headers, data=json.dumps(patch_data))
-                    if response.status_code in [200, 204]:
-                        self.update_status(f"Model {uid} patched successfully.")
-                        return 'success'
-                    elif response.status_code == 429:  # Rate limit error
-                        self.update_status(f"Rate limit hit while patching model {uid}. Retrying in {backoff_time} seconds.")
-                        return 'error'
-                    else:
-                        self.update_status(f"Failed to patch model {uid}: {response.status_code} - {response.text}")
-                        return 'error'
-                except requests.RequestException as e:
-                    self.update_status(f"Network error while patching model {uid}: {e}.")
-                    return 'error'
-                attempts += 1
-
-            self.update_status(f"Max retries reached for model {uid}, patching aborted.")
-            return 'error'
-
-    
-    def create_zip_from_folder(self, folder_path, zip_name):
-        """
-        Create a zip file from the contents of a folder.
-        """
-        zip_path = os.path.join(folder_path, zip_name)
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if file_path != zip_path and file.endswith(('.zip', '.glb')):
-                        zipf.write(file_path, arcname=os.path.relpath(file_path, folder_path))
-        return zip_path
-    
-    def poll_processing_status(self, model_url, model_name, tab_name, uid, original_license, price):
-        """
-        Poll the processing status of an uploaded model.
-        """
-        print(f"Polling status for {model_name} with UID {uid} at URL {model_url}")
-        headers = {'Authorization': f'Token {self.api_key.get()}'}
-        max_retries = 200
-        retry_timeout = 30
-        retry_count = 0
-        patch_status = 'Not started'  # Initialize patch_status here
-
-        while retry_count < max_retries:
-            sleep(retry_timeout)
-            try:
-                response = requests.get(model_url, headers=headers)
-                if response.status_code == 200:
-                    status_info = response.json()
-                    processing_status = status_info['status']['processing']
-                    print(f"Processing status for {model_name}: {processing_status}")
-
-                    if processing_status == 'SUCCEEDED':
-                        print(self.original_license)
-                        print(price)
-                        self.update_tree_view(model_name, 'Complete', 'Processing Completed', tab_name, 'Starting...', 'Fully Completed')
-                        sleep(5)
-                        if self.original_license in ['st', 'ed']:
-                            patch_result = self.patch_model(uid, self.original_license, price)
-                            patch_status = 'Patch Successful' if patch_result == 'success' else 'Patch Failed'
-                            self.update_tree_view(model_name, 'Complete', 'Processing Completed', tab_name, patch_status, 'Fully Completed')
-                            break  # Break the loop since processing has succeeded
-                        else:
-                            patch_status = 'No Patch Required'
-                            self.update_tree_view(model_name, 'Upload Successful', 'Completed', tab_name, patch_status, 'Fully Completed')
-                    elif processing_status == 'FAILED':
-                        patch_status = 'Patch Not Attempted'
-                        self.update_tree_view(model_name, 'Processing Failed', processing_status, tab_name, patch_status, 'Aborted')
-
-            except requests.RequestException as exc:
-                patch_status = 'Patch Error'
-                self.update_tree_view(model_name, 'Upload Failed', str(exc), tab_name, patch_status, 'Aborted')
-
-        if retry_count >= max_retries:
-            patch_status = 'Max retries reached'
-            self.update_tree_view(model_name, 'Upload Failed', 'Max retries reached', tab_name, patch_status, 'Aborted')
-    
-    def upload_folder(self, folder_path, main_folder_name, thread_id):
-        """
-        Upload a folder containing a model to Sketchfab.
-        """
-        with self.upload_semaphore:
-            try:
-                self.thread_status[thread_id] = None
-
-                # Validation checks
-                if not hasattr(self, 'category1_combobox') or not hasattr(self, 'category2_combobox') or not hasattr(self, 'license_combobox'):
-                    return
-
-                model_name = os.path.basename(folder_path)
-                display_name = model_name
-                self.update_tree_view(model_name, 'Uploading...', 'In progress', main_folder_name, 'Patch Not Started', 'In Progress')
-
-                # Collect and validate category and license information
-                category1_slug = self.category_map1.get(self.category1_combobox.get())
-                category2_slug = self.category_map2.get(self.category2_combobox.get())
-                license_slug = self.license_map.get(self.license_combobox.get())
-                if not category1_slug or not license_slug:
-                    self.update_tree_view(display_name, 'Upload Failed', 'Invalid category or license', main_folder_name, 'Invalid', 'Aborted')
-                    return
-
-                description = self.description_textbox.get("1.0", ctk.END).strip()
-                tags_input = self.tags_textbox.get("1.0", ctk.END).strip()
-                tags_list = tags_input.split('\n') if tags_input else []
-
-                zip_name = f"model_{random.randint(1000, 9999)}.zip"
-                zip_file_path = self.create_zip_from_folder(folder_path, zip_name)
-
-                # Handle pricing information for certain licenses
-                price_float = None
-                if license_slug in ['st', 'ed']:
-                    normalized_price = self.price.get().replace(',', '.')
-                    try:
-                        price_float = float(normalized_price)
-                    except ValueError:
-                        self.update_tree_view(display_name, 'Invalid Price Format', 'Please enter a valid number', main_folder_name, 'Invalid', 'Aborted')
-                        return
-
-                data = {
-                    'name': model_name,
-                    'description': description,
-                    'tags': tags_list,
-                    'categories': [category1_slug] + ([category2_slug] if category2_slug else []),
-                    'license': license_slug,
-                    'private': bool(self.private.get()),
-                    'password': self.password.get() if self.private.get() else None,
-                    'isPublished': bool(self.isPublished.get()),
-                    'isInspectable': bool(self.isInspectable.get()),
-                    'price': price_float if price_float else None
-                }
-
-                uid, url, status, self.original_license, error_message = self.upload_model(zip_file_path, data)
-                if status == 429:
-                    self.thread_status[thread_id] = 429
-                    return self.upload_folder(folder_path, main_folder_name, thread_id)  # Retry upload
-                elif status == 'success':
-                    self.thread_status[thread_id] = 'success'
-                    print(self.original_license)
-                    threading.Thread(target=self.poll_processing_status, args=(url, display_name, main_folder_name, uid, self.original_license, price_float), daemon=True).start()
-                    self.update_tree_view(model_name, 'Upload Successful', 'Processing...', main_folder_name, 'Patch Not Started', 'In Progress')
-                else:
-                    self.thread_status[thread_id] = 'failed'
-                    self.update_tree_view(display_name, 'Upload Failed', error_message or 'Error during upload', main_folder_name, 'Failed', 'Aborted')
-
-                if os.path.exists(zip_file_path):
-                    os.remove(zip_file_path)
-            finally:
-                print("Finished")
+            self.update_status(f"Resuming requests: {reason}")
 
 if __name__ == "__main__":
     app = UploadApp()
-    app.mainloop()
\ No newline at end of file
+    app.start()
@@ -0,0 +1,36 @@
+import json
+
+from event_log import EventLog
+
+
+def read_seqs(path):
+    with open(path, 'r', encoding='utf-8') as log_file:
+        return [json.loads(line)['seq'] for line in log_file]
+
+
+def test_rotation_keeps_the_newest_backups(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    events = EventLog(str(path), max_bytes=300, backups=2, flush_interval=60)
+    for index in range(40):
+        events.log(f"event {index}", model='x' * 50)
+        events.flush()
+    events.close()
+
+    backups = [tmp_path / 'events.jsonl.1', tmp_path / 'events.jsonl.2']
+    assert all(backup.exists() for backup in backups)
+    assert not (tmp_path / 'events.jsonl.3').exists()
+    newer, older = (read_seqs(backup) for backup in backups)
+    assert max(older) < min(newer)
+    current = read_seqs(path) if path.exists() else []
+    assert (current or newer)[-1] == 40
+
+
+def test_events_since_filters_by_level(tmp_path):
+    events = EventLog(str(tmp_path / 'events.jsonl'), flush_interval=60)
+    events.log("quiet", 'debug')
+    shown = events.log("shown")
+    events.log("broken", 'error')
+    events.close()
+
+    assert [event['message'] for event in events.events_since(0, min_level='info')] == ['shown', 'broken']
+    assert [event['message'] for event in events.events_since(shown['seq'])] == ['broken']
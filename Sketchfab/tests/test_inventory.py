@@ -0,0 +1,80 @@
+import pytest
+
+from inventory import ModelInventory
+
+
+def api_model(uid, minute, day=1):
+    return {'uid': uid, 'name': uid, 'createdAt': f'2026-01-{day:02d}T00:{minute:02d}:00Z',
+            'status': {'processing': 'SUCCEEDED'}, 'tags': [{'slug': 'my-tag'}]}
+
+
+class FakeAccount:
+    """
+    Serve the account listing newest first in windows of ten models, optionally failing at a window.
+    Deleted models are gone from the API, missed ones only from the listing.
+    """
+    def __init__(self, models):
+        self.models = models
+        self.fail_at = None
+        self.deleted = set()
+        self.missed = set()
+        self.windows = 0
+
+    def iter_pages(self, executor):
+        listing = [model for model in self.models if model['uid'] not in self.deleted | self.missed]
+        for start in range(0, len(listing), 10):
+            if self.fail_at is not None and start >= self.fail_at:
+                raise ConnectionError("Connection lost")
+            self.windows += 1
+            yield listing[start:start + 10]
+
+    def look_up(self, uid):
+        if uid in self.deleted:
+            return None, True
+        return next(model for model in self.models if model['uid'] == uid), False
+
+
+@pytest.fixture
+def account(tmp_path, monkeypatch):
+    account = FakeAccount([api_model(f'old{index}', 59 - index) for index in range(30)])
+    monkeypatch.setattr(ModelInventory, 'iter_pages', lambda inventory, executor: account.iter_pages(executor))
+    monkeypatch.setattr(ModelInventory, 'look_up', lambda inventory, uid: account.look_up(uid))
+    account.inventory = ModelInventory('key', str(tmp_path / 'inventory.db'))
+    return account
+
+
+def test_interrupted_incremental_sync_is_resumed(account):
+    inventory = account.inventory
+    inventory.sync(full=True)
+    account.models = [api_model(f'new{index}', 59 - index, day=2) for index in range(25)] + account.models
+
+    account.fail_at = 10
+    with pytest.raises(ConnectionError):
+        inventory.sync()
+    account.fail_at = None
+    counts = inventory.sync()
+
+    assert counts['added'] == 15
+    assert len(inventory.models()) == 55
+    account.windows = 0
+    assert inventory.sync()['added'] == 0
+    assert account.windows == 1  # Stops at the models of the last completed sync
+
+
+def test_full_sync_marks_only_models_the_api_no_longer_has(account):
+    inventory = account.inventory
+    inventory.sync(full=True)
+    account.deleted.add('old3')
+    account.missed.add('old4')  # The listing shifted while it was paged and skipped a model
+
+    counts = inventory.sync(full=True)
+
+    assert counts['removed'] == 1
+    assert {model['uid'] for model in inventory.models()} == {f'old{index}' for index in range(30)} - {'old3'}
+
+
+def test_metadata_tags_match_as_slugs():
+    model = {'license': 'cc-by', 'tags': ['my-tag', 'this-is-a-new-tag']}
+
+    assert ModelInventory.matches_metadata(model, {'license': 'cc-by', 'tags': ['My Tag', 'This is a new tag']})
+    assert not ModelInventory.matches_metadata(model, {'license': 'cc-by', 'tags': ['Other tag']})
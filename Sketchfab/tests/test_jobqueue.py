@@ -0,0 +1,79 @@
+import time
+
+from jobqueue import JobQueue
+from scheduler import Batch
+
+
+def queue_with(path, *batches, **options):
+    queue = JobQueue(str(path / 'jobs.db'), **options)
+    for batch in batches:
+        queue.enqueue_batch(batch)
+    return queue
+
+
+def test_lease_prefers_batches_with_fewer_started_jobs_per_priority(tmp_path):
+    normal = Batch('normal', ['/n1', '/n2', '/n3'], {})
+    urgent = Batch('urgent', ['/u1', '/u2', '/u3'], {}, priority=5)
+    queue = queue_with(tmp_path, normal, urgent)
+
+    leased = [queue.lease('worker')['folder_path'] for _ in range(6)]
+
+    assert leased == ['/n1', '/u1', '/u2', '/u3', '/n2', '/n3']
+    assert queue.lease('worker') is None
+
+
+def test_new_batch_gets_no_credit_for_finished_jobs(tmp_path):
+    first = Batch('first', [f'/a{index}' for index in range(30)], {})
+    queue = queue_with(tmp_path, first)
+    for _ in range(20):
+        job = queue.lease('worker')
+        queue.complete(job['id'], 'worker', 'done')
+
+    queue.enqueue_batch(Batch('second', [f'/b{index}' for index in range(10)], {}))
+    leased = [queue.lease('worker')['batch_name'] for _ in range(10)]
+
+    assert leased.count('first') == 5
+    assert all(leased[index] != leased[index + 1] for index in range(len(leased) - 1))
+
+
+def test_expired_lease_is_requeued_then_failed(tmp_path):
+    queue = queue_with(tmp_path, Batch('batch', ['/model'], {}), lease_seconds=0.05, max_attempts=2)
+
+    first = queue.lease('dead')
+    time.sleep(0.1)
+    second = queue.lease('alive')
+    assert second['id'] == first['id']
+    assert second['attempts'] == 2
+    assert second['first_leased'] == first['first_leased']
+    assert not queue.complete(first['id'], 'dead', 'done')  # The lease went to another worker
+
+    time.sleep(0.1)
+    assert queue.lease('alive') is None
+    job = queue.changes_since(second['batch_id'], 0)[0]
+    assert (job['state'], job['status']) == ('failed', 'Worker lost')
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = queue_with(tmp_path, Batch('batch', ['/model'], {}), lease_seconds=0.2)
+
+    job = queue.lease('worker')
+    for _ in range(4):
+        time.sleep(0.1)
+        queue.heartbeat('worker', [job['id']])
+    assert queue.lease('other') is None
+    assert queue.complete(job['id'], 'worker', 'done')
+    assert queue.counts(job['batch_id']) == {'done': 1}
+
+
+def test_changes_since_follows_versions(tmp_path):
+    batch = Batch('batch', ['/a', '/b'], {})
+    queue = queue_with(tmp_path, batch)
+    version = max(job['version'] for job in queue.changes_since(batch.id, 0))
+
+    job = queue.lease('worker')
+    queue.report(job['id'], 'worker', 'a', 'Uploading...', 'In progress', 'Patch Not Started', 'In Progress')
+    changed = queue.changes_since(batch.id, version)
+
+    assert [row['folder_path'] for row in changed] == ['/a']
+    assert changed[0]['status'] == 'Uploading...'
+    assert queue.changes_since(batch.id, changed[0]['version']) == []
@@ -0,0 +1,49 @@
+import os
+import zipfile
+
+import pytest
+
+from model_packaging import model_files, package_folder
+from watcher import TEMP_ARCHIVE_PREFIX
+
+
+def write(path, data=b'model data'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_single_model_file_is_uploaded_as_it_is(tmp_path):
+    chair = write(tmp_path / 'model_chair.zip')
+
+    assert package_folder(str(tmp_path), f'{TEMP_ARCHIVE_PREFIX}test.zip') == (chair, False)
+
+
+def test_archive_excludes_only_itself(tmp_path):
+    write(tmp_path / 'model_chair.zip')
+    write(tmp_path / 'parts' / 'table.glb')
+    write(tmp_path / 'notes.txt')
+
+    zip_path, temporary = package_folder(str(tmp_path), f'{TEMP_ARCHIVE_PREFIX}test.zip')
+
+    assert temporary
+    assert os.path.basename(zip_path) == f'{TEMP_ARCHIVE_PREFIX}test.zip'
+    with zipfile.ZipFile(zip_path) as archive:
+        assert sorted(archive.namelist()) == ['model_chair.zip', 'parts/table.glb']
+    assert sorted(os.path.relpath(path, tmp_path) for path in model_files(str(tmp_path), exclude=zip_path)) == \
+        ['model_chair.zip', os.path.join('parts', 'table.glb')]
+
+
+def test_leftover_temporary_archive_is_not_packed(tmp_path):
+    write(tmp_path / f'{TEMP_ARCHIVE_PREFIX}old.zip')
+    chair = write(tmp_path / 'chair.glb')
+
+    assert package_folder(str(tmp_path), f'{TEMP_ARCHIVE_PREFIX}new.zip') == (chair, False)
+
+
+def test_folder_without_model_files_is_refused(tmp_path):
+    write(tmp_path / 'readme.txt')
+
+    with pytest.raises(ValueError):
+        package_folder(str(tmp_path), f'{TEMP_ARCHIVE_PREFIX}test.zip')
+    assert not (tmp_path / f'{TEMP_ARCHIVE_PREFIX}test.zip').exists()
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from retry import CircuitBreaker
+
+
+def opened_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure("API down")
+    time.sleep(0.1)  # Past the cooldown, the breaker is half open
+    return breaker
+
+
+def start_waiters(breaker, count, passed):
+    def wait():
+        breaker.wait()
+        passed.append(threading.get_ident())
+
+    threads = [threading.Thread(target=wait, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_half_open_breaker_lets_a_single_probe_through():
+    breaker = opened_breaker()
+    breaker.wait()  # This thread is the probe
+    passed = []
+    threads = start_waiters(breaker, 5, passed)
+    time.sleep(0.1)
+    assert passed == []
+
+    breaker.record_success()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert len(passed) == 5
+    assert not breaker.half_open
+
+
+def test_failed_probe_opens_the_breaker_again():
+    breaker = opened_breaker()
+    breaker.wait()
+    passed = []
+    threads = start_waiters(breaker, 3, passed)
+
+    breaker.record_failure("Still down")
+    assert breaker.is_open()
+    time.sleep(0.2)
+    assert len(passed) == 1  # The next probe after the cooldown, the others wait for it
+
+    breaker.record_success()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert len(passed) == 3
+
+
+def test_waiting_without_probing_leaves_the_probe_to_a_request():
+    breaker = opened_breaker()
+    breaker.wait(probe=False)
+    assert breaker.probe is None
+    breaker.wait()
+    assert breaker.probe[0] == threading.get_ident()
+
+
+def test_abandoned_probe_hands_over_to_the_next_caller():
+    breaker = opened_breaker()
+    breaker.wait()
+    passed = []
+    threads = start_waiters(breaker, 2, passed)
+    time.sleep(0.05)
+
+    breaker.abandon_probe()
+    time.sleep(0.1)
+    assert len(passed) == 1
+    breaker.record_success()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert len(passed) == 2
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from scheduler import Batch, FairLimiter
+
+
+def grant_order(limiter, batches, jobs_per_batch):
+    """
+    Queue jobs_per_batch waiters for every batch behind a held slot, then return the order
+    in which the batches got the slot.
+    """
+    blocker = Batch('blocker', [], {})
+    limiter.acquire(blocker)
+    order = []
+
+    def job(batch):
+        with limiter.slot(batch):
+            order.append(batch.name)
+
+    threads = [threading.Thread(target=job, args=(batch,)) for batch in batches for _ in range(jobs_per_batch)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while sum(len(tickets) for tickets in limiter.waiting.values()) < len(threads):
+        assert time.monotonic() < deadline, "waiters didn't queue up"
+        time.sleep(0.01)
+    limiter.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+def test_slots_are_shared_by_priority():
+    normal = Batch('normal', [], {}, priority=1)
+    urgent = Batch('urgent', [], {}, priority=5)
+    order = grant_order(FairLimiter(1), [normal, urgent], 30)
+
+    first = order[:30]
+    assert 4 <= first.count('normal') <= 6
+    assert 24 <= first.count('urgent') <= 26
+    assert len(order) == 60
+
+
+def test_equal_priorities_alternate():
+    first = Batch('first', [], {})
+    second = Batch('second', [], {})
+    order = grant_order(FairLimiter(1), [first, second], 5)
+
+    assert all(order[index] != order[index + 1] for index in range(len(order) - 1))
+
+
+def test_idle_batch_gets_no_credit():
+    limiter = FairLimiter(1)
+    busy = Batch('busy', [], {})
+    idle = Batch('idle', [], {})
+    for _ in range(10):
+        with limiter.slot(busy):
+            pass
+    # idle rejoins at the pass of the last granted slot instead of ten slots behind busy
+    order = grant_order(limiter, [busy, idle], 4)
+
+    assert order[:4].count('idle') == 2
@@ -0,0 +1,60 @@
+import time
+
+from watcher import TEMP_ARCHIVE_PREFIX, FolderWatcher, is_model_file
+
+
+def write(path, data=b'model data'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def poll_until_settled(watcher, seconds):
+    """
+    Poll like the watcher thread does and return every folder reported meanwhile.
+    """
+    reported = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        reported += watcher.poll()
+        time.sleep(0.02)
+    return reported
+
+
+def test_temporary_archives_are_not_model_files():
+    assert is_model_file('model_chair.zip')
+    assert is_model_file('chair.glb')
+    assert not is_model_file(f'{TEMP_ARCHIVE_PREFIX}0123abcd.zip')
+    assert not is_model_file('chair.obj')
+
+
+def test_existing_folders_are_the_baseline(tmp_path):
+    write(tmp_path / 'old' / 'chair.glb')
+    watcher = FolderWatcher(on_ready=None, settle_time=0.1)
+    watcher.add_root(str(tmp_path))
+
+    assert poll_until_settled(watcher, 0.3) == []
+
+
+def test_new_folder_is_reported_once_it_settled(tmp_path):
+    watcher = FolderWatcher(on_ready=None, settle_time=0.3)
+    watcher.add_root(str(tmp_path))
+    folder = tmp_path / 'new'
+    write(folder / 'chair.glb')
+
+    # Still being copied, every change restarts the settle time
+    for size in range(1, 6):
+        write(folder / 'chair.glb', b'x' * size * 1000)
+        assert watcher.poll() == []
+        time.sleep(0.1)
+
+    assert poll_until_settled(watcher, 0.6) == [str(folder)]
+    assert poll_until_settled(watcher, 0.2) == []  # Reported only once
+
+
+def test_folder_with_only_a_temporary_archive_is_ignored(tmp_path):
+    watcher = FolderWatcher(on_ready=None, settle_time=0.1)
+    watcher.add_root(str(tmp_path))
+    write(tmp_path / 'uploading' / f'{TEMP_ARCHIVE_PREFIX}0123abcd.zip')
+    write(tmp_path / 'nested' / 'deeper' / 'model_table.zip')
+
+    assert poll_until_settled(watcher, 0.4) == [str(tmp_path / 'nested' / 'deeper')]
@@ -0,0 +1,155 @@
+"""
+Headless benchmark of how responsive the window stays during a storm of status updates.
+
+It runs the status tab code of UploadApp against synthetic updates, without the Sketchfab API
+or the upload engine. On a machine without a display run it under Xvfb:
+
+    xvfb-run -a python ui_benchmark.py --rows 10000
+
+It prints p50 and p99 of the main loop latency and of every kind of UI update. The exit status
+is 1 when the p99 main loop latency is above --max-p99, so UI regressions fail the build.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from time import perf_counter, sleep
+
+from event_log import EventLog
+from sketchfab import ENGINE_POLL_INTERVAL, UploadApp
+
+# Every model goes through these states, like a model that uploads, processes and gets patched
+STATES = [
+    ('Uploading...', 'In progress', 'Patch Not Started', 'In Progress'),
+    ('Upload Successful', 'Processing...', 'Patch Not Started', 'In Progress'),
+    ('Complete', 'Processing Completed', 'Starting...', 'Fully Completed'),
+    ('Complete', 'Processing Completed', 'Patch Successful', 'Fully Completed'),
+]
+
+
+class BenchmarkApp(UploadApp):
+    """
+    UploadApp with empty category and license lists instead of the ones from the Sketchfab API.
+    """
+    def __init__(self):
+        super().__init__()
+        self.events.close()
+        self.events = EventLog(os.devnull)  # Keep the benchmark out of the real event log
+
+    def fetch_data(self):
+        self.categories = [""]
+        self.category_map1 = {}
+        self.category_map2 = {}
+        self.licenses = []
+        self.license_map = {}
+
+
+def storm(rows, updates_per_row):
+    """
+    Yield (model name, state) updates, every round moves all models one state further.
+    """
+    for step in range(updates_per_row):
+        for index in range(rows):
+            yield f"model_{index:05d}", STATES[min(step, len(STATES) - 1)]
+
+
+def feed_engine(app, tab_name, updates, rate, messages_every):
+    """
+    Hand updates to the window the way sync_with_engine does, coalesced per poll.
+    """
+    per_poll = max(1, int(rate * ENGINE_POLL_INTERVAL))
+    count = 0
+    while True:
+        chunk = [update for _, update in zip(range(per_poll), updates)]
+        if not chunk:
+            return
+        with app.engine_lock:
+            for model_name, state in chunk:
+                app.engine_rows[(tab_name, model_name)] = (model_name,) + state
+                count += 1
+                if count % messages_every == 0:
+                    app.engine_messages.append(f"[INFO] {model_name}: {state[0]}")
+        sleep(ENGINE_POLL_INTERVAL)
+
+
+def feed_direct(app, tab_name, updates, rate, messages_every):
+    """
+    Call update_tree_view from this background thread for every single update, like the job queue
+    monitor and bulk edit do. Every update is also written to the event log.
+    """
+    per_poll = max(1, int(rate * ENGINE_POLL_INTERVAL))
+    count = 0
+    while True:
+        chunk = [update for _, update in zip(range(per_poll), updates)]
+        if not chunk:
+            return
+        for model_name, state in chunk:
+            app.update_tree_view(model_name, state[0], state[1], tab_name, state[2], state[3])
+            count += 1
+            if count % messages_every == 0:
+                app.update_status(f"{model_name}: {state[0]}")
+        sleep(ENGINE_POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how responsive the window stays during a status update storm.")
+    parser.add_argument('--rows', type=int, default=10000, help="Models in the status tab")
+    parser.add_argument('--updates-per-row', type=int, default=len(STATES), help="Status changes of every model")
+    parser.add_argument('--rate', type=float, default=5000, help="Updates per second")
+    parser.add_argument('--messages-every', type=int, default=10, help="One status box message per this many updates")
+    parser.add_argument('--mode', choices=('engine', 'direct'), default='engine',
+                        help="engine: coalesced rows as sent by the upload engine, direct: update_tree_view per update from a thread")
+    parser.add_argument('--max-p99', type=float, default=250, help="Highest acceptable p99 main loop latency in ms")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    app = BenchmarkApp()
+    tab_name = "Benchmark [storm]"
+    app.create_status_tab(tab_name, args.rows)
+    app.notebook.select(app.notebook.index('end') - 1)  # Rows of a visible tree cost the most to draw
+
+    updates = storm(args.rows, args.updates_per_row)
+    feed = feed_engine if args.mode == 'engine' else feed_direct
+    feeder = threading.Thread(target=feed, args=(app, tab_name, updates, args.rate, args.messages_every), daemon=True)
+
+    def finish_when_drained():
+        with app.engine_lock:
+            backlog = len(app.engine_rows)
+        if feeder.is_alive() or backlog:
+            app.after(100, finish_when_drained)
+        else:
+            app.after(500, app.quit)  # Let the status box catch up
+
+    app.ui_monitor.start()
+    app.check_and_update_status()
+    app.refresh_engine_rows()
+    started = perf_counter()
+    feeder.start()
+    app.after(100, finish_when_drained)
+    app.mainloop()
+    elapsed = perf_counter() - started
+    app.ui_monitor.stop()
+
+    report = app.ui_monitor.report()
+    rows_shown = len(app.status_trees[tab_name].get_children())
+    app.destroy()
+    app.events.close()
+
+    latency_p99 = report.get('main_loop_latency', {}).get('p99') or 0.0
+    if args.json:
+        print(json.dumps({'mode': args.mode, 'rows': rows_shown, 'updates': args.rows * args.updates_per_row,
+                          'seconds': elapsed, 'metrics': report}, indent=2))
+    else:
+        print(f"{args.mode} mode: {args.rows * args.updates_per_row} updates of {rows_shown} rows in {elapsed:.1f} s")
+        print(f"{'metric':<20}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, stats in sorted(report.items()):
+            print(f"{name:<20}{stats['count']:>8}{stats['p50']:>10.1f}{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+    if latency_p99 > args.max_p99:
+        print(f"p99 main loop latency {latency_p99:.1f} ms is above {args.max_p99:.0f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
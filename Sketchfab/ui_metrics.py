@@ -0,0 +1,103 @@
+import functools
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a list of numbers, None for an empty list.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def timed_ui(name):
+    """
+    Decorator timing a method of a window that has a ui_monitor.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.ui_monitor.timed(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class UIMonitor:
+    """
+    Measure how responsive the Tk main loop is.
+
+    A probe is scheduled with after() every interval_ms. How late it runs is how long the main
+    loop was busy with something else, which is how long the window didn't react to the user.
+    UI updates can also be timed by name with timed(). All samples are in milliseconds and only
+    the last capacity samples of each metric are kept.
+    """
+    def __init__(self, widget, interval_ms=50, capacity=10000):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.capacity = capacity
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.expected = None
+        self.running = False
+
+    def start(self):
+        """
+        Start probing the main loop latency.
+        """
+        if not self.running:
+            self.running = True
+            self._schedule_probe()
+
+    def stop(self):
+        self.running = False
+
+    def record(self, name, milliseconds):
+        """
+        Store a sample of a metric.
+        """
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=self.capacity)).append(milliseconds)
+
+    @contextmanager
+    def timed(self, name):
+        """
+        Record how long the body of a with block takes under the given metric name.
+        """
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (perf_counter() - started) * 1000)
+
+    def report(self):
+        """
+        Return count, p50, p99 and max of every metric.
+        """
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        return {name: {'count': len(values), 'p50': percentile(values, 50), 'p99': percentile(values, 99), 'max': max(values)}
+                for name, values in samples.items() if values}
+
+    def reset(self):
+        """
+        Drop the samples collected so far.
+        """
+        with self.lock:
+            self.samples = {}
+
+    def _schedule_probe(self):
+        self.expected = perf_counter() + self.interval_ms / 1000
+        self.widget.after(self.interval_ms, self._probe)
+
+    def _probe(self):
+        self.record('main_loop_latency', max(0.0, (perf_counter() - self.expected) * 1000))
+        if self.running:
+            self._schedule_probe()
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+MODEL_EXTENSIONS = ('.zip', '.glb')
+TEMP_ARCHIVE_PREFIX = '.sketchfab_tmp_'  # Archives the uploader writes into a model folder while uploading it
+
+
+def is_model_file(name):
+    """
+    Check whether a file name is a model file the uploader picks up.
+    Temporary archives written by the uploader itself are ignored.
+    """
+    return name.endswith(MODEL_EXTENSIONS) and not name.startswith(TEMP_ARCHIVE_PREFIX)
+
+
+class FolderWatcher:
+    """
+    Watch one or more root folders and report model folders once their files stop changing.
+
+    Only directories whose modification time changed are listed again, so a cycle costs
+    one stat per known directory instead of a full os.walk of every root.
+    """
+    def __init__(self, on_ready, settle_time=10, poll_interval=2, include_existing=False):
+        self.on_ready = on_ready
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.include_existing = include_existing
+        self.roots = []
+        self._dir_mtimes = {}  # Known directory -> last seen mtime
+        self._pending = {}  # Candidate folder -> (signature, time the signature was first seen)
+        self._reported = set()  # Folders already handed to on_ready
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_root(self, root):
+        """
+        Start watching a root folder. Folders present at this point are treated as the baseline.
+        """
+        root = os.path.normpath(root)
+        with self._lock:
+            if root in self.roots:
+                return
+            self.roots.append(root)
+            self._scan_tree(root, baseline=not self.include_existing)
+
+    def start(self):
+        """
+        Start the background polling thread.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background polling thread.
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+        self._thread = None
+
+    def is_running(self):
+        """
+        Check whether the polling thread is alive.
+        """
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            for folder in self.poll():
+                self.on_ready(folder)
+
+    def poll(self):
+        """
+        Run a single detection cycle and return the folders that settled during it.
+        """
+        with self._lock:
+            for directory, last_mtime in list(self._dir_mtimes.items()):
+                if directory not in self._dir_mtimes:
+                    continue  # Dropped together with a removed parent earlier in this cycle
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    self._forget(directory)
+                    continue
+                if mtime != last_mtime:
+                    self._scan_tree(directory, baseline=False)
+            return self._check_pending(time.monotonic())
+
+    def _scan_tree(self, root, baseline):
+        """
+        Scan a directory and every subdirectory below it that is not known yet.
+        """
+        stack = [root]
+        while stack:
+            stack.extend(self._scan_dir(stack.pop(), baseline))
+
+    def _scan_dir(self, directory, baseline):
+        """
+        List a single directory, register new subdirectories and queue it if it holds model files.
+        Returns new subdirectories that still need to be scanned.
+        """
+        new_dirs = []
+        has_models = False
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in self._dir_mtimes:
+                            new_dirs.append(entry.path)
+                    elif is_model_file(entry.name):
+                        has_models = True
+            self._dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._forget(directory)
+            return []
+
+        if has_models and directory not in self._reported:
+            if baseline:
+                self._reported.add(directory)
+            elif directory not in self._pending:
+                self._pending[directory] = (None, time.monotonic())
+
+        return new_dirs
+
+    def _signature(self, folder):
+        """
+        Build a signature of the model files in a folder from their sizes and modification times.
+        """
+        signature = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and is_model_file(entry.name):
+                    stat = entry.stat()
+                    signature.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(sorted(signature))
+
+    def _check_pending(self, now):
+        """
+        Re-check queued folders and return the ones whose files have not changed for settle_time.
+        """
+        ready = []
+        for folder, (last_signature, since) in list(self._pending.items()):
+            try:
+                signature = self._signature(folder)
+            except OSError:
+                del self._pending[folder]
+                continue
+            if not signature:
+                del self._pending[folder]
+            elif signature != last_signature:
+                self._pending[folder] = (signature, now)
+            elif now - since >= self.settle_time:
+                del self._pending[folder]
+                self._reported.add(folder)
+                ready.append(folder)
+        return ready
+
+    def _forget(self, directory):
+        """
+        Drop a removed directory and everything known below it.
+        """
+        prefix = directory + os.sep
+        for known in [d for d in self._dir_mtimes if d == directory or d.startswith(prefix)]:
+            del self._dir_mtimes[known]
+        for known in [d for d in self._pending if d == directory or d.startswith(prefix)]:
+            del self._pending[known]
+        self._reported = {d for d in self._reported if d != directory and not d.startswith(prefix)}
@@ -0,0 +1,179 @@
+"""
+Headless upload worker that takes model jobs from a shared job queue.
+
+Run one on every host that should help with a batch queued from the GUI with "Use job queue":
+
+    python worker.py --queue //server/share/sketchfab_jobs.db --api-key YOUR_KEY
+
+The model folders have to be reachable under the same path on every host.
+"""
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+from datetime import datetime
+from time import sleep
+
+from event_log import EventLog
+from jobqueue import JobQueue
+from pipeline import CLOCK_SKEW, UploadPipeline
+from retry import CircuitBreaker, RetryEngine
+from scheduler import Batch
+from simulator import StageTimings
+
+
+class JobBatch(Batch):
+    """
+    Batch made for a single leased job, so progress reports can be tied back to the job.
+    """
+    def __init__(self, job, api_key):
+        super().__init__(job['batch_name'], [], job['metadata'], job['priority'], api_key=api_key, batch_id=job['batch_id'])
+        self.job_id = job['id']
+
+
+class Worker:
+    """
+    Lease jobs from the queue and run them through the upload pipeline.
+
+    concurrency threads package and upload. Once a model is uploaded its thread takes the next
+    job, processing is followed on a thread of its own. A job keeps its lease until it is done.
+    """
+    def __init__(self, queue, api_key, concurrency=6, worker_id=None, idle_wait=5):
+        self.queue = queue
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.idle_wait = idle_wait
+        self.events = EventLog(f"sketchfab_worker_{self.worker_id}.jsonl")
+        self.breaker = CircuitBreaker(on_state_change=self.on_breaker_change)
+        self.pipeline = UploadPipeline(RetryEngine(self.breaker), StageTimings(), self.events, self.report)
+        self.active_jobs = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        """
+        Work until interrupted.
+        """
+        self.events.log(f"Worker {self.worker_id} started with {self.concurrency} threads", queue=self.queue.path)
+        threads = [threading.Thread(target=self.work_loop, daemon=True) for _ in range(self.concurrency)]
+        threads.append(threading.Thread(target=self.heartbeat_loop, daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while not self.stop_event.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop_event.set()
+        self.events.close()
+
+    def work_loop(self):
+        while not self.stop_event.is_set():
+            self.breaker.wait(probe=False)
+            try:
+                job = self.queue.lease(self.worker_id)
+            except sqlite3.Error as e:
+                self.events.log(f"Could not lease a job: {e}", 'warning')
+                sleep(self.idle_wait)
+                continue
+            if job is None:
+                sleep(self.idle_wait)
+                continue
+            with self.lock:
+                self.active_jobs.add(job['id'])
+            self.run_job(job)
+
+    def run_job(self, job):
+        """
+        Upload one model folder, then hand it to a thread that follows its processing.
+        """
+        batch = JobBatch(job, self.api_key)
+        created_after = None
+        if job['attempts'] > 1:
+            # Another worker may have uploaded it before it died, don't create a duplicate
+            created_after = datetime.utcfromtimestamp(job['first_leased']) - CLOCK_SKEW
+        self.events.log(f"Leased {job['folder_path']} (attempt {job['attempts']})", job=job['id'], batch=job['batch_id'])
+        try:
+            uploaded = self.pipeline.upload_folder(batch, job['folder_path'], created_after)
+        except Exception as e:
+            self.report(batch, os.path.basename(job['folder_path']), 'Upload Failed', str(e), 'Failed', 'Aborted')
+            self.finish_job(job, 'failed', str(e))
+            return
+        if uploaded is None:
+            self.finish_job(job, 'failed', 'Upload Failed')
+            return
+        threading.Thread(target=self.follow_processing, args=(job, batch, uploaded), daemon=True).start()
+
+    def follow_processing(self, job, batch, uploaded):
+        """
+        Poll and patch an uploaded model and record the result in the queue.
+        """
+        uid, url, original_license, upload_size = uploaded
+        model_name = os.path.basename(job['folder_path'])
+        try:
+            state, detail = self.pipeline.poll_processing_status(batch, url, model_name, uid, original_license,
+                                                                 batch.metadata['price'], upload_size)
+        except Exception as e:
+            state, detail = 'failed', str(e)
+            self.report(batch, model_name, 'Upload Failed', detail, 'Failed', 'Aborted')
+        self.finish_job(job, state, detail)
+
+    def finish_job(self, job, state, detail):
+        """
+        Record the result of a job in the queue and drop its lease.
+        While the queue can't be written the job keeps its lease and the write is tried again.
+        """
+        try:
+            while True:
+                try:
+                    completed = self.queue.complete(job['id'], self.worker_id, state)
+                    break
+                except sqlite3.Error as e:
+                    self.events.log(f"Could not record the result of job {job['id']}: {e}", 'warning', job=job['id'])
+                    if self.stop_event.wait(self.idle_wait):
+                        return  # The lease runs out and another worker picks the job up
+            if not completed:
+                self.events.log(f"Lease of job {job['id']} was lost before it finished", 'warning', job=job['id'])
+            self.events.log(f"Job {job['id']} {state}: {detail}", 'error' if state == 'failed' else 'info', job=job['id'])
+        finally:
+            with self.lock:
+                self.active_jobs.discard(job['id'])
+
+    def heartbeat_loop(self):
+        while not self.stop_event.wait(self.queue.lease_seconds / 3):
+            with self.lock:
+                job_ids = list(self.active_jobs)
+            try:
+                self.queue.heartbeat(self.worker_id, job_ids)
+            except Exception as e:
+                self.events.log(f"Heartbeat failed: {e}", 'warning')
+
+    def report(self, batch, model_name, status, progress, patch_status, summary):
+        """
+        Write model progress to the queue, where the GUI picks it up.
+        """
+        try:
+            self.queue.report(batch.job_id, self.worker_id, model_name, status, progress, patch_status, summary)
+        except sqlite3.Error as e:
+            # Only the progress shown in the GUI is lost, the next report or the result catches up
+            self.events.log(f"Could not report progress of {model_name}: {e}", 'warning', job=batch.job_id)
+
+    def on_breaker_change(self, opened, reason):
+        self.events.log(f"{'Pausing' if opened else 'Resuming'} requests: {reason}", 'warning' if opened else 'info')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload models from a shared Sketchfab job queue.")
+    parser.add_argument('--queue', required=True, help="Path of the shared job queue file")
+    parser.add_argument('--api-key', default=os.environ.get('SKETCHFAB_API_KEY'), help="Sketchfab API key (default: $SKETCHFAB_API_KEY)")
+    parser.add_argument('--concurrency', type=int, default=6, help="Jobs packaged and uploaded at the same time")
+    parser.add_argument('--worker-id', help="Name of this worker, defaults to host name and process id")
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error("an API key is required, pass --api-key or set SKETCHFAB_API_KEY")
+    Worker(JobQueue(args.queue), args.api_key, args.concurrency, args.worker_id).run()
+
+
+if __name__ == "__main__":
+    main()